@@ -1,12 +1,16 @@
 # app/api/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.dependencies import get_db, get_current_active_admin
 from app.models.employee import Employee, UserType
 from app.schemas.employee import EmployeeCreate, EmployeeResponse, EmployeeWithAnalytics
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core.auth import invalidate_principal
+from app.core.revocation import revocation_list
+from app.core.llm_usage import llm_usage_recorder
+from app.core.subprocess_scheduler import audio_tool_scheduler
 from fastapi import Body
 
 router = APIRouter()
@@ -131,7 +135,7 @@ async def create_user(
         department=user.department,
         position=user.position,
         profile_image=user.profile_image,
-        hashed_password=get_password_hash(user.password),
+        hashed_password=await get_password_hash_async(user.password),
         wellness_check_status=user.wellness_check_status,
         last_vibe=user.last_vibe,
         immediate_attention=user.immediate_attention,
@@ -140,6 +144,7 @@ async def create_user(
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    invalidate_principal(new_user.id)
 
     return new_user
 
@@ -185,6 +190,8 @@ async def delete_user(
 
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
+    revocation_list.revoke(db, user_id, reason="user deleted")
 
     return None
 
@@ -201,8 +208,63 @@ async def reset_employee_password(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
         )
-    employee.update(hashed_password = get_password_hash(new_password))
+    employee.update(hashed_password = await get_password_hash_async(new_password))
     db.commit()
     db.refresh(employee)
+    invalidate_principal(employee_id)
+    revocation_list.revoke(db, employee_id, reason="password reset")
 
     return employee
+
+
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_tokens(
+    user_id: str,
+    reason: str = Body("forced logout", embed=True),
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_active_admin),
+):
+    """
+    Force logout of a user, e.g. after a role change
+    """
+    user = db.query(Employee).filter(Employee.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    invalidate_principal(user_id)
+    revocation_list.revoke(db, user_id, reason=reason)
+
+    return None
+
+
+@router.get("/llm-usage")
+def get_llm_usage(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_active_admin),
+):
+    """
+    Per-day, per-endpoint LLM token usage, latency, retries and fallbacks.
+
+    A plain def, so FastAPI runs the flush and rollup queries on its thread
+    pool instead of the event loop.
+    """
+    # Include calls still waiting in the write buffer
+    llm_usage_recorder.flush(db)
+    return {
+        "days": days,
+        "rollups": llm_usage_recorder.rollups(db, days),
+        "process": llm_usage_recorder.snapshot(),
+    }
+
+
+@router.get("/audio-tools/stats")
+async def get_audio_tool_stats(
+    current_user: Employee = Depends(get_current_active_admin),
+):
+    """
+    Queue wait, run time and failure rate of the ffmpeg and Rhubarb processes
+    """
+    return audio_tool_scheduler.snapshot()
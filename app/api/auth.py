@@ -1,54 +1,97 @@
 # app/api/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
 from app.dependencies import get_db
 from app.models.employee import Employee
 from app.schemas.auth import Token, EmployeeLogin
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, create_access_token
+from app.core.rate_limit import login_throttle
 from app.config import settings
 from app.models.employee import UserType
 
 router = APIRouter()
 
 
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _enforce_login_throttle(request: Request, account: str) -> None:
+    """
+    Reject the attempt before any password hashing if the IP or account is throttled
+    """
+    retry_after = login_throttle.check(_client_ip(request), account)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def _role_claims(employee: Employee) -> dict:
+    """
+    Role and status claims embedded in the access token
+    """
+    return {
+        "role": employee.user_type.value,
+        "status": employee.wellness_check_status.value,
+    }
+
+
 @router.post("/login/user", response_model=Token)
-async def login_user(user_login: EmployeeLogin, db: Session = Depends(get_db)):
+async def login_user(
+    user_login: EmployeeLogin, request: Request, db: Session = Depends(get_db)
+):
     """
     Login for HR and Admin users
     """
+    _enforce_login_throttle(request, user_login.employee_id)
+
     user = db.query(Employee).filter(Employee.id == user_login.employee_id).first()
 
-    if not user or not verify_password(user_login.password, str(user.hashed_password)):
+    if not user or not await verify_password_async(
+        user_login.password, str(user.hashed_password)
+    ):
+        login_throttle.record_failure(_client_ip(request), user_login.employee_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    login_throttle.record_success(user_login.employee_id)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.id, expires_delta=access_token_expires
+        subject=user.id,
+        expires_delta=access_token_expires,
+        claims=_role_claims(user),
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/login/employee", response_model=Token)
-async def login_employee(employee_login: EmployeeLogin, db: Session = Depends(get_db)):
+async def login_employee(
+    employee_login: EmployeeLogin, request: Request, db: Session = Depends(get_db)
+):
     """
     Login for employees
     """
+    _enforce_login_throttle(request, employee_login.employee_id)
+
     employee = (
         db.query(Employee)
         .filter(Employee.id == employee_login.employee_id)
         .first()
     )
 
-    if not employee or not verify_password(
+    if not employee or not await verify_password_async(
         employee_login.password, str(employee.hashed_password)
     ):
+        login_throttle.record_failure(_client_ip(request), employee_login.employee_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect employee ID or password",
@@ -60,11 +103,14 @@ async def login_employee(employee_login: EmployeeLogin, db: Session = Depends(ge
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid employee type",
         )
-    
+
+    login_throttle.record_success(employee_login.employee_id)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=employee.id, expires_delta=access_token_expires
+        subject=employee.id,
+        expires_delta=access_token_expires,
+        claims=_role_claims(employee),
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,12 +1,27 @@
 # app/api/chatbot.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime
+import asyncio
+import json
+import logging
 import os
-from typing import List
-import random
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
+from app.database import SessionLocal
 from app.dependencies import get_db, get_current_employee
+from app.core.auth import authenticate_token
 from app.models.chat_session import ChatSession
 from app.models.message import Message
 from app.models.employee import Employee
@@ -19,12 +34,23 @@ from app.schemas.chat import (
     MessageCreate,
     MessageResponse
 )
-from app.services.analytics import AnalyticsService
+from app.services.context_cache import employee_context_cache
+from app.services.chat import (
+    FAREWELL_UTTERANCE,
+    ConversationHistory,
+    chat_history_builder,
+    intro_bundle,
+)
 from app.services.email import EmailService
-from app.services.audio_service import audio_service
-from app.services.elevenlabs_service import elevenlabs_service
+from app.services.speech_service import speech_service
+from app.services.voice_activity import EnergyVAD
+from app.services.reply_audio import build_reply_message, message_audio_path, render_reply_audio
 from app.core.openai_client import openai_client
+from app.core.model_router import model_router
 from app.config import settings
+from app.utils.helper import StageTimer, parse_byte_range
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -55,6 +81,7 @@ async def create_chat_session(
     ).first()
     
     if existing_session:
+        employee_context_cache.get(db, existing_session.session_id, current_employee.id)
         return existing_session
 
     # Create new session
@@ -65,7 +92,13 @@ async def create_chat_session(
     db.commit()
     db.refresh(new_session)
 
-    return new_session
+    # Compute the prompt context once; every turn of the session reuses it
+    employee_context_cache.prime(db, new_session.session_id, current_employee.id)
+
+    # Greeting audio comes from memory; None while the bundle is still rendering
+    response = ChatSessionResponse.model_validate(new_session, from_attributes=True)
+    response.intro_messages = intro_bundle.intro_messages()
+    return response
 
 @router.get("/sessions/{session_id}", response_model=ChatSessionWithMessages)
 async def get_chat_session(
@@ -86,107 +119,529 @@ async def get_chat_session(
         messages=[MessageResponse.from_orm(m) for m in messages]
     )
 
-@router.post("/sessions/{session_id}/message")
-async def send_message(
-    session_id: str,
-    msg: MessageCreate,
-    db: Session = Depends(get_db),
-    current_employee: Employee = Depends(get_current_employee),
-):
-    print(f"Received message for session_id: {session_id}, from employee: {current_employee.id}")
-    
-    session = db.query(ChatSession).filter(
-        ChatSession.session_id == session_id,
-        ChatSession.employee_id == current_employee.id
-    ).first()
-    if not session:
-        print(f"Session not found for session_id: {session_id}")
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    print("Session found, saving user message")
-    # Save the user message
-    user_msg = Message(session_id=session_id, question=msg.question, answer="")
-    db.add(user_msg)
-    db.commit()
-    db.refresh(user_msg)
-    print(f"User message saved: {user_msg.question}")
-    
+async def _synthesize_reply(text: str, timer: StageTimer) -> Dict[str, Any]:
+    """
+    TTS, audio conversion and lipsync for a bot reply
+    """
+    audio_base64, lipsync_data, audio_id = await render_reply_audio(text, timer)
+    return build_reply_message(
+        text,
+        audio_base64,
+        lipsync_data,
+        audio_id,
+        facial_expression='message_data["facialExpression"]',
+        animation='message_data["animation"]',
+    )
+
+
+# Per-turn artifact ids are uuid4 hex
+AUDIO_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_file_range(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(AUDIO_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.get("/audio/{audio_id}")
+async def get_reply_audio(audio_id: str, request: Request):
+    """
+    Serve reply audio for AUDIO_DELIVERY=url.
+
+    audio_id is a random per-turn uuid handed out only in the reply, so the
+    URL itself grants access and <audio> elements can fetch it without an
+    Authorization header. TTS cache keys are never accepted: they can be
+    computed from a reply's text. Supports ETag revalidation and single byte
+    ranges.
+    """
+    if not AUDIO_ID_PATTERN.match(audio_id):
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    path = message_audio_path(audio_id)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    # The content behind an id never changes
+    headers = {
+        "ETag": f'"{audio_id}"',
+        "Cache-Control": f"private, max-age={settings.AUDIO_RETENTION_SECONDS}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") in (headers["ETag"], "*"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+
+    status_code = status.HTTP_200_OK
+    start, end = 0, size - 1
+    if byte_range:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        _iter_file_range(path, start, end - start + 1),
+        status_code=status_code,
+        media_type="audio/mpeg",
+        headers=headers,
+    )
+
+
+async def _prepare_turn(
+    db: Session,
+    session: ChatSession,
+    current_employee: Employee,
+    question: str,
+    timer: StageTimer,
+) -> Tuple[Dict[str, Any], ConversationHistory]:
+    """
+    Save the user's message and gather the context for a chat turn; returns
+    the keyword arguments for the OpenAI client call and the budgeted
+    conversation history.
+    """
+    session_id = session.session_id
+
     # Get employee data
-    print(f"Fetching employee data for employee_id: {current_employee.id}")
-    employee_data = AnalyticsService.get_employee_data(db, current_employee.id)
-    print(f"Employee data fetched: {employee_data}")
-    
-    # Get message history for context
-    print(f"Fetching message history for session_id: {session_id}")
-    history = db.query(Message).filter(Message.session_id == session_id).all()
-    prev_messages = [
-        {"question": m.question, "answer": m.answer} for m in history
-    ]
-    print(f"Message history: {prev_messages}")
-    
-    # Call AI with history
-    print("Calling AI to generate response")
-    ai_response = await openai_client.generate_response(
-        db=db,
-        employee_id=current_employee.id,
-        chat_session_id=session_id,
-        message=msg.question,
-        previous_messages=prev_messages,
+    with timer.stage("employee_data"):
+        employee_data = employee_context_cache.get(db, session_id, current_employee.id)
+
+    # Get message history for context; the current question is sent separately
+    with timer.stage("history"):
+        rows = (
+            db.query(Message)
+            .filter(Message.session_id == session_id)
+            .order_by(Message.id)
+            .all()
+        )
+        history = chat_history_builder.build(
+            [{"question": m.question, "answer": m.answer} for m in rows],
+            summary=session.summary,
+            summarized_count=session.summarized_messages or 0,
+        )
+    logger.debug(f"Session {session_id}: {len(history.messages)} history messages")
+
+    # Save the user message before calling the model, so it is kept even if
+    # the reply fails or the client goes away
+    db.add(Message(session_id=session_id, question=question, answer=""))
+    await timer.track("save_question", asyncio.to_thread(db.commit))
+
+    model_choice = model_router.for_chat_turn(
+        session_id,
+        turn_index=sum(1 for m in rows if m.question),
         employee_data=employee_data,
+        escalated=bool(session.escalated),
     )
-    print(f"AI response received: {ai_response}")
-    
-    # Create and save the bot message
+
+    request_kwargs = {
+        "db": db,
+        "employee_id": current_employee.id,
+        "chat_session_id": session_id,
+        "message": question,
+        "previous_messages": history.messages,
+        "employee_data": employee_data,
+        "model_choice": model_choice,
+    }
+    return request_kwargs, history
+
+
+async def _finish_turn(
+    db: Session,
+    session: ChatSession,
+    current_employee: Employee,
+    ai_response: Dict[str, Any],
+    history: ConversationHistory,
+    timer: StageTimer,
+) -> Dict[str, Any]:
+    """
+    Persist the reply and synthesize its audio. Audio runs while the reply
+    is committed; any escalation email goes out in the background.
+    """
+    session_id = session.session_id
+    model_router.record_turn(session_id, ai_response)
+
+    # Create the bot message; it is committed alongside audio synthesis
     bot_msg = Message(
         session_id=session_id,
         question="",
         answer=ai_response["content"][0]["text"]
     )
     db.add(bot_msg)
-    print(f"Bot message created: {bot_msg.answer}")
-    
+
     # Update session data if conversation is complete
     if ai_response.get("isComplete", False):
-        print("Conversation marked as complete, updating session data")
+        logger.debug(f"Session {session_id} complete, updating session data")
         session.risk_factors = ", ".join(ai_response.get("risk_factors", []))
         session.risk_score = ai_response.get("risk_score", 0)
         session.suggestions = ", ".join(ai_response.get("suggestions", []))
-    
-    # Handle escalation recommendation
-    if ai_response.get("hr_escalation", False):
-        print("HR escalation recommended, sending notification")
+
+    escalate = ai_response.get("hr_escalation", False)
+    if escalate:
         session.escalated = True
-        await EmailService.send_hr_notification(
-            employee_name=str(current_employee.name),
-            session_id=session_id,
-            reason=session.suggestions,
+
+    # Everything below is independent: audio only needs the reply text and
+    # the commit only touches the DB session
+    pending = [
+        _synthesize_reply(bot_msg.answer, timer),
+        timer.track("persist", asyncio.to_thread(db.commit)),
+    ]
+
+    # Handle escalation recommendation; the reply does not wait for the email
+    if escalate:
+        logger.info(f"Session {session_id} escalated, notifying HR")
+        EmailService.send_in_background(
+            EmailService.send_hr_notification(
+                employee_name=str(current_employee.name),
+                session_id=session_id,
+                reason=session.suggestions,
+            )
         )
-    
-    i=random.randint(1000,9999)
-    mp3_filename = f"message_{i}.mp3"
-    mp3_path = os.path.join(settings.AUDIO_DIR, mp3_filename)
-    await elevenlabs_service.text_to_speech(bot_msg.answer, mp3_filename)
-    
-    # Process audio (convert to WAV, generate lipsync)
-    audio_base64, lipsync_data = await audio_service.process_audio_for_message(i, bot_msg.answer)
-    
-    # Create message object
-    message = {
-        "text": bot_msg.answer,
-        "audio": audio_base64,
-        "lipsync": lipsync_data,
-        "facialExpression": 'message_data["facialExpression"]',
-        "animation": 'message_data["animation"]'
-    }
 
+    # Fold messages that left the history window into the rolling summary
+    if history.to_summarize:
+        pending.append(
+            timer.track(
+                "summarize",
+                openai_client.summarize_conversation(
+                    session.summary, history.to_summarize
+                ),
+            )
+        )
 
+    message, *rest = await asyncio.gather(*pending)
+
+    new_summary = rest[-1] if history.to_summarize else None
+    if new_summary:
+        session.summary = new_summary
+        session.summarized_messages = history.summarized_count
+        await asyncio.to_thread(db.commit)
+
+    return message
 
-    db.commit()
-    db.refresh(bot_msg)
-    print("Database changes committed and bot message refreshed")
+
+async def _run_chat_turn(
+    db: Session,
+    session: ChatSession,
+    current_employee: Employee,
+    question: str,
+    timer: StageTimer,
+) -> Dict[str, Any]:
+    """
+    Run one chat turn and return the reply message with audio and lipsync
+    """
+    request_kwargs, history = await _prepare_turn(
+        db, session, current_employee, question, timer
+    )
+
+    # Call AI with history
+    with timer.stage("llm"):
+        ai_response = await openai_client.generate_response(**request_kwargs)
+
+    return await _finish_turn(
+        db, session, current_employee, ai_response, history, timer
+    )
+
+
+def _set_timing_headers(response: Response, timer: StageTimer) -> None:
+    logger.info(f"Chat turn timings: {timer.server_timing_header()}")
+    if settings.DEBUG_TIMING_HEADERS:
+        response.headers["Server-Timing"] = timer.server_timing_header()
+
+
+@router.post("/sessions/{session_id}/message")
+async def send_message(
+    session_id: str,
+    msg: MessageCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_employee: Employee = Depends(get_current_employee),
+):
+    timer = StageTimer()
+
+    with timer.stage("load_session"):
+        session = db.query(ChatSession).filter(
+            ChatSession.session_id == session_id,
+            ChatSession.employee_id == current_employee.id
+        ).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    message = await _run_chat_turn(db, session, current_employee, msg.question, timer)
+    _set_timing_headers(response, timer)
 
     return [message]
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Streamed turns still running; referenced so they are not collected
+_stream_turns: Set[asyncio.Task] = set()
+
+
+async def _run_stream_turn(
+    session_id: str,
+    current_employee: Employee,
+    question: str,
+    frames: "asyncio.Queue[Optional[str]]",
+) -> None:
+    """
+    Run a streamed chat turn, putting SSE frames on frames (None at the end).
+
+    Runs as its own task with its own DB session rather than inside the
+    response generator, so the turn is saved even if the client disconnects
+    mid-stream.
+    """
+    timer = StageTimer()
+    db = SessionLocal()
+    try:
+        session = db.query(ChatSession).filter(
+            ChatSession.session_id == session_id,
+            ChatSession.employee_id == current_employee.id
+        ).first()
+        request_kwargs, history = await _prepare_turn(
+            db, session, current_employee, question, timer
+        )
+
+        ai_response = None
+        with timer.stage("llm"):
+            async for event in openai_client.generate_response_stream(**request_kwargs):
+                if event["type"] == "token":
+                    if "first_token" not in timer.stages:
+                        timer.stages["first_token"] = timer.total_ms()
+                    frames.put_nowait(_sse("token", {"text": event["text"]}))
+                else:
+                    ai_response = event["response"]
+
+        message = await _finish_turn(
+            db, session, current_employee, ai_response, history, timer
+        )
+        frames.put_nowait(_sse(
+            "audio",
+            {key: value for key, value in message.items() if key != "text"},
+        ))
+        frames.put_nowait(_sse(
+            "final",
+            {
+                "text": message["text"],
+                "hr_escalation": ai_response["hr_escalation"],
+                "escalation_reason": ai_response["escalation_reason"],
+                "suggestions": ai_response["suggestions"],
+                "risk_factors": ai_response["risk_factors"],
+                "risk_score": ai_response["risk_score"],
+                "isComplete": ai_response["isComplete"],
+            },
+        ))
+        logger.info(f"Streamed chat turn timings: {timer.server_timing_header()}")
+        if settings.DEBUG_TIMING_HEADERS:
+            frames.put_nowait(_sse("timings", timer.stages))
+    except Exception as e:
+        logger.error(f"Streamed chat turn for session {session_id} failed: {str(e)}")
+        frames.put_nowait(_sse("error", {"detail": "Could not generate a reply"}))
+    finally:
+        db.close()
+        frames.put_nowait(None)
+
+
+@router.post("/sessions/{session_id}/message/stream")
+async def send_message_stream(
+    session_id: str,
+    msg: MessageCreate,
+    db: Session = Depends(get_db),
+    current_employee: Employee = Depends(get_current_employee),
+):
+    """
+    Streaming variant of send_message over Server-Sent Events.
+
+    Frames, in order: "token" ({"text"}) as the reply text arrives, one
+    "audio" frame ({"audio", "lipsync", "facialExpression", "animation"}),
+    a "final" frame with the full text and analyze_response fields, and
+    (with DEBUG_TIMING_HEADERS) "timings" with the per-stage durations. If
+    the turn fails, an "error" frame ({"detail"}) ends the stream.
+
+    The turn runs to completion and is saved even if the client disconnects.
+    """
+    session = db.query(ChatSession).filter(
+        ChatSession.session_id == session_id,
+        ChatSession.employee_id == current_employee.id
+    ).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    frames: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+    task = asyncio.create_task(
+        _run_stream_turn(session_id, current_employee, msg.question, frames)
+    )
+    _stream_turns.add(task)
+    task.add_done_callback(_stream_turns.discard)
+
+    async def event_stream():
+        while True:
+            frame = await frames.get()
+            if frame is None:
+                break
+            yield frame
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/sessions/{session_id}/voice")
+async def voice_session(
+    websocket: WebSocket,
+    session_id: str,
+):
+    """
+    Voice input over a WebSocket.
+
+    The first message must be {"type": "auth", "token": <access token>},
+    sent within VOICE_AUTH_TIMEOUT_SECONDS; the token is not put in the URL,
+    where it would end up in access logs. The server answers
+    {"type": "ready"}; invalid tokens or sessions close the socket with 1008.
+
+    The client streams binary frames of 16-bit mono PCM at
+    settings.VOICE_SAMPLE_RATE. Speech segments are transcribed as soon as
+    the speaker pauses, while they keep talking, and each result is sent as
+    {"type": "partial", "text"}. When the utterance ends (a long pause, or a
+    {"type": "end"} text frame) the client gets {"type": "transcript", "text"}
+    and the text runs through the send_message pipeline, answered with
+    {"type": "reply", "message"} (plus "timings" with DEBUG_TIMING_HEADERS).
+
+    No DB connection is held while the socket is open: each turn uses its
+    own short-lived session.
+    """
+    await websocket.accept()
+    try:
+        auth = await asyncio.wait_for(
+            websocket.receive_json(), settings.VOICE_AUTH_TIMEOUT_SECONDS
+        )
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError, KeyError):
+        auth = None
+
+    current_employee = None
+    if isinstance(auth, dict) and auth.get("type") == "auth" and isinstance(auth.get("token"), str):
+        current_employee = authenticate_token(auth["token"])
+    if current_employee is None:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials"
+        )
+        return
+
+    db = SessionLocal()
+    try:
+        session_exists = db.query(ChatSession.session_id).filter(
+            ChatSession.session_id == session_id,
+            ChatSession.employee_id == current_employee.id
+        ).first() is not None
+    finally:
+        db.close()
+    if not session_exists:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Session not found")
+        return
+    await websocket.send_json({"type": "ready"})
+
+    vad = EnergyVAD(
+        sample_rate=settings.VOICE_SAMPLE_RATE,
+        frame_ms=settings.VOICE_VAD_FRAME_MS,
+        min_rms=settings.VOICE_VAD_MIN_RMS,
+        segment_silence_ms=settings.VOICE_SEGMENT_SILENCE_MS,
+        utterance_silence_ms=settings.VOICE_UTTERANCE_SILENCE_MS,
+        max_segment_ms=settings.VOICE_MAX_SEGMENT_SECONDS * 1000,
+    )
+    # Transcriptions of the current utterance's segments, in speaking order
+    segments: List[asyncio.Task] = []
+
+    async def send(event: Dict[str, Any]) -> bool:
+        """Send an event; False once the client has gone away."""
+        try:
+            await websocket.send_json(event)
+            return True
+        except Exception as e:
+            # The client disconnected mid-turn (the turn itself is already saved)
+            logger.info(f"Voice session {session_id} closed before send: {str(e)}")
+            return False
+
+    async def transcribe_segment(pcm: bytes) -> str:
+        text = (await speech_service.transcribe_pcm(pcm, settings.VOICE_SAMPLE_RATE)).strip()
+        if text:
+            await send({"type": "partial", "text": text})
+        return text
+
+    async def finish_utterance() -> bool:
+        texts = await asyncio.gather(*segments)
+        segments.clear()
+        question = " ".join(text for text in texts if text)
+        if not question:
+            return True
+        if not await send({"type": "transcript", "text": question}):
+            return False
+
+        timer = StageTimer()
+        db = SessionLocal()
+        try:
+            session = db.query(ChatSession).filter(
+                ChatSession.session_id == session_id,
+                ChatSession.employee_id == current_employee.id
+            ).first()
+            if not session:
+                return False
+            message = await _run_chat_turn(db, session, current_employee, question, timer)
+        finally:
+            db.close()
+        logger.info(f"Voice chat turn timings: {timer.server_timing_header()}")
+        reply: Dict[str, Any] = {"type": "reply", "message": message}
+        if settings.DEBUG_TIMING_HEADERS:
+            reply["timings"] = timer.stages
+        return await send(reply)
+
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            if frame.get("bytes"):
+                events = vad.feed(frame["bytes"])
+            elif frame.get("text"):
+                try:
+                    control = json.loads(frame["text"])
+                except ValueError:
+                    continue
+                if not isinstance(control, dict) or control.get("type") != "end":
+                    continue
+                events = vad.flush()
+            else:
+                continue
+
+            for kind, pcm in events:
+                if kind == "segment":
+                    segments.append(asyncio.create_task(transcribe_segment(pcm)))
+                elif not await finish_utterance():
+                    return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in segments:
+            task.cancel()
+
 @router.post("/sessions/{session_id}/end", response_model=ChatSessionResponse)
 async def end_chat_session(
     session_id: str,
@@ -205,11 +660,13 @@ async def end_chat_session(
     farewell_message = Message(
         session_id=session_id,
         question="Session Ended",
-        answer="Thank you for chatting with me today! I hope our conversation was helpful."
+        answer=FAREWELL_UTTERANCE["text"]
     )
 
     db.add(farewell_message)
     db.commit()
     db.refresh(session)
 
-    return session
\ No newline at end of file
+    response = ChatSessionResponse.model_validate(session, from_attributes=True)
+    response.farewell_message = intro_bundle.farewell_message()
+    return response
\ No newline at end of file
@@ -13,7 +13,8 @@ from typing import Dict
 from openai import AsyncOpenAI
 
 from app.dependencies import get_db, get_current_active_hr
-from app.core.security import get_password_hash
+from app.core.auth import invalidate_principal
+from app.core.security import get_password_hash_async
 from app.models.employee import Employee, UserType, WellnessCheckStatus
 from app.models.vibemeter import VibemeterData
 from app.models.chat_session import ChatSession
@@ -26,6 +27,8 @@ from app.schemas.chat import MessageBaseNew
 from app.models.rewards import Reward
 from app.schemas.employee import EmployeeWithAnalytics
 from app.schemas.analytics import (
+    BulkAlertJobStatus,
+    BulkAlertRequest,
     EmployeeAlert,
     EmployeeSessionAnalyticsNew,
     DailyReport,
@@ -34,6 +37,10 @@ from app.schemas.upload import DatasetType, UploadResponse, AtRiskEmployee
 from app.schemas.chat import ChatSessionBaseNew
 from app.services.analytics import AnalyticsService
 from app.services.email import EmailService
+from app.services.alert_jobs import bulk_alert_jobs
+from app.services.context_cache import employee_context_cache
+from app.core.openai_client import openai_client
+from app.core.resilience import CircuitOpenError, OverloadedError
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -290,6 +297,62 @@ async def get_employee_analytics(
     return analytics
 
 
+@router.post(
+    "/alerts/email/bulk",
+    response_model=BulkAlertJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def send_bulk_alert_emails(
+    alert_request: BulkAlertRequest,
+    db: Session = Depends(get_db),
+    current_user: Employee = Depends(get_current_active_hr),
+):
+    """
+    Start sending the alert email to a list of employees, or to every
+    employee flagged for immediate attention. Sending runs in the background;
+    poll GET /alerts/email/bulk/{job_id} for per-recipient status
+    """
+    if not alert_request.employee_ids and not alert_request.immediate_attention:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide employee_ids or set immediate_attention",
+        )
+
+    # All recipients in one query
+    query = db.query(Employee)
+    if alert_request.employee_ids:
+        query = query.filter(Employee.id.in_(alert_request.employee_ids))
+    if alert_request.immediate_attention:
+        query = query.filter(Employee.immediate_attention == True)
+    employees = query.all()
+
+    found = {str(employee.id) for employee in employees}
+    missing_ids = [
+        employee_id
+        for employee_id in dict.fromkeys(alert_request.employee_ids or [])
+        if employee_id not in found
+    ]
+
+    job = bulk_alert_jobs.start(employees, missing_ids)
+    return job.snapshot()
+
+
+@router.get("/alerts/email/bulk/{job_id}", response_model=BulkAlertJobStatus)
+async def get_bulk_alert_job(
+    job_id: str,
+    current_user: Employee = Depends(get_current_active_hr),
+):
+    """
+    Progress and per-recipient status of a bulk alert job
+    """
+    job = bulk_alert_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Alert job not found"
+        )
+    return job.snapshot()
+
+
 @router.post("/alerts/email/{employee_id}", status_code=status.HTTP_200_OK)
 async def send_alert_email(
     employee_id: str,
@@ -305,10 +368,7 @@ async def send_alert_email(
             status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
         )
 
-    success = await EmailService.send_employee_alert(
-        db=db,
-        employee_id=employee_id,
-    )
+    success = await EmailService.send_alert_to(employee)
 
     if not success:
         raise HTTPException(
@@ -377,19 +437,8 @@ async def get_daily_report(
     prompt = prompt_template.replace("[TABLE DATA WILL BE INSERTED HERE]", table_data)
 
     try:
-
-        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        print("API Key:", settings.OPENAI_API_KEY)
-        response = await client.chat.completions.create(
-            model="gpt-4o",  # Use appropriate model
-            messages=[{"role": "system", "content": prompt}],
-            temperature=0.2,  # Lower temperature for more consistent output
-            max_tokens=500,
-            response_format={"type": "json_object"},
-        )
-
-        # Parse JSON response
-        report_json = response.choices[0].message.content
+        # Goes through the shared LLM limiter, retry policy and circuit breaker
+        report_json = await openai_client.generate_daily_report(prompt)
 
         # Convert to Pydantic model for validation
         # This will raise a validation error if the structure doesn't match
@@ -397,6 +446,12 @@ async def get_daily_report(
 
         return report
 
+    except (OverloadedError, CircuitOpenError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Report generation is temporarily unavailable: {str(e)}",
+            headers={"Retry-After": str(int(settings.LLM_BREAKER_RESET_SECONDS))},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error generating report: {str(e)}"
@@ -548,6 +603,7 @@ async def upload_data(
         )
 
     processed_data = {}
+    touched_employee_ids = set()
 
     for file, dataset_type_str in zip(files, dataset_types):
         if file.content_type != "text/csv":
@@ -570,6 +626,8 @@ async def upload_data(
 
         # Parse CSV data
         df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+        if "Employee_ID" in df.columns:
+            touched_employee_ids.update(df["Employee_ID"].dropna().astype(str))
 
         if dataset_type == DatasetType.LEAVE:
             processed_data[DatasetType.LEAVE] = await process_leave_data(db, df)
@@ -599,6 +657,9 @@ async def upload_data(
             #     detail=f"Error processing file {file.filename}: {str(e)}",
             # )
 
+    # Cached chatbot context is stale for anyone whose data just changed
+    employee_context_cache.invalidate_employees(touched_employee_ids)
+
     # Analyze vibemeter data
     vibemeter_analysis = await analyze_vibemeter(processed_data)
 
@@ -614,6 +675,9 @@ async def upload_data(
             at_risk_employees.append(AtRiskEmployee(employee_id=employee_id))
 
         db.commit()
+        # Cached principals carry immediate_attention
+        for employee in at_risk_employees:
+            invalidate_principal(employee.employee_id)
 
     return UploadResponse(at_risk_employees=at_risk_employees)
 
@@ -701,7 +765,7 @@ async def process_leave_data(db: Session, df: pd.DataFrame) -> pd.DataFrame:
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -757,7 +821,7 @@ async def process_activity_data(db: Session, df: pd.DataFrame) -> pd.DataFrame:
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -815,7 +879,7 @@ async def process_rewards_data(db: Session, df: pd.DataFrame) -> pd.DataFrame:
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -869,7 +933,7 @@ async def process_performance_data(db: Session, df: pd.DataFrame) -> pd.DataFram
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -925,7 +989,7 @@ async def process_vibemeter_data(db: Session, df: pd.DataFrame) -> pd.DataFrame:
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -983,7 +1047,7 @@ async def process_onboarding_data(db: Session, df: pd.DataFrame) -> pd.DataFrame
                 id=str(row["Employee_ID"]),
                 name="Jake Doe",  # Placeholder, should be replaced with actual name
                 email="jakedoe@example.com",
-                hashed_password=get_password_hash("dummyhashedpassword"),
+                hashed_password=await get_password_hash_async("dummyhashedpassword"),
                 phone="1234567890",
                 department="HR",
                 position="HR Manager",
@@ -1,4 +1,5 @@
 # app/config.py
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 import os
@@ -16,6 +17,26 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
 
+    # Authenticated principal cache (skips the per-request employee lookup)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+    # How often the in-memory token revocation list is reloaded from the database
+    REVOCATION_REFRESH_SECONDS: int = int(os.getenv("REVOCATION_REFRESH_SECONDS", "30"))
+    # Role and status claims are trusted without a lookup only this long after
+    # the token was issued; older tokens are checked against the database
+    ROLE_CLAIM_TTL_SECONDS: int = int(os.getenv("ROLE_CLAIM_TTL_SECONDS", "900"))
+
+    # Password hashing runs on a bounded thread pool (bcrypt releases the GIL)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+    # Login throttling
+    LOGIN_RATE_WINDOW_SECONDS: int = int(os.getenv("LOGIN_RATE_WINDOW_SECONDS", "60"))
+    LOGIN_MAX_FAILURES_PER_IP: int = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", "20"))
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = int(
+        os.getenv("LOGIN_MAX_FAILURES_PER_ACCOUNT", "5")
+    )
+
     # In your config.py file
     SUPABASE_USER: str = "postgres"  # Usually "postgres"
     SUPABASE_PASSWORD: str = os.getenv("SUPABASE_PASSWORD", "")
@@ -37,6 +58,12 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     EMAILS_FROM_EMAIL: str = os.getenv("EMAILS_FROM_EMAIL", "noreply@example.com")
     EMAILS_FROM_NAME: str = os.getenv("EMAILS_FROM_NAME", "Vibemeter Bot")
+    # Persistent SMTP connections, one per sender thread; idle ones are checked with NOOP before reuse
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+    SMTP_IDLE_CHECK_SECONDS: float = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+    # Finished bulk alert jobs stay queryable for this long
+    ALERT_JOB_RETENTION_SECONDS: int = int(os.getenv("ALERT_JOB_RETENTION_SECONDS", "86400"))
 
     # API keys
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
@@ -44,20 +71,137 @@ class Settings(BaseSettings):
 
     # Voice ID for ElevenLabs
     VOICE_ID: str = os.getenv("VOICE_ID", "cgSgspJ2msm6clMCkdW9")
+    ELEVEN_LABS_BASE_URL: str = os.getenv("ELEVEN_LABS_BASE_URL", "https://api.elevenlabs.io")
+    ELEVEN_LABS_TIMEOUT_SECONDS: float = float(os.getenv("ELEVEN_LABS_TIMEOUT_SECONDS", "30"))
+    ELEVEN_LABS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("ELEVEN_LABS_CONNECT_TIMEOUT_SECONDS", "5"))
+    ELEVEN_LABS_MAX_CONNECTIONS: int = int(os.getenv("ELEVEN_LABS_MAX_CONNECTIONS", "20"))
 
     SELF_HOSTED_WHISPER_URL: str = os.getenv("SELF_HOSTED_WHISPER_URL", "")
+    # Speech-to-text: per-backend concurrency, queue and timeouts
+    STT_MAX_CONCURRENCY: int = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+    STT_MAX_QUEUE: int = int(os.getenv("STT_MAX_QUEUE", "32"))
+    STT_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("STT_QUEUE_TIMEOUT_SECONDS", "5"))
+    STT_TIMEOUT_SECONDS: float = float(os.getenv("STT_TIMEOUT_SECONDS", "60"))
+    # Speech-to-text backend used by SpeechService.transcribe: "openai", "self_hosted" or "local"
+    STT_BACKEND: str = os.getenv("STT_BACKEND", "openai")
+    # Local Whisper engine (STT_BACKEND=local): one model per worker process
+    WHISPER_LOCAL_MODEL: str = os.getenv("WHISPER_LOCAL_MODEL", "base")
+    WHISPER_LOCAL_THREADS: int = int(os.getenv("WHISPER_LOCAL_THREADS", "2"))
+    WHISPER_LOCAL_WORKERS: int = int(os.getenv("WHISPER_LOCAL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    WHISPER_LOCAL_BATCH_SIZE: int = int(os.getenv("WHISPER_LOCAL_BATCH_SIZE", "8"))
+    WHISPER_LOCAL_BATCH_WAIT_MS: float = float(os.getenv("WHISPER_LOCAL_BATCH_WAIT_MS", "50"))
+    WHISPER_LOCAL_QUANTIZE: bool = os.getenv("WHISPER_LOCAL_QUANTIZE", "false").lower() == "true"
+    WHISPER_LOCAL_LANGUAGE: str = os.getenv("WHISPER_LOCAL_LANGUAGE", "")
+    # Clips waiting for the local engine before new ones are rejected as overloaded
+    WHISPER_LOCAL_MAX_QUEUE: int = int(os.getenv("WHISPER_LOCAL_MAX_QUEUE", "64"))
+    # Voice input over WebSocket: 16-bit mono PCM at VOICE_SAMPLE_RATE (16 kHz for the local engine)
+    VOICE_SAMPLE_RATE: int = int(os.getenv("VOICE_SAMPLE_RATE", "16000"))
+    # The first voice message must carry the access token within this many seconds
+    VOICE_AUTH_TIMEOUT_SECONDS: float = float(os.getenv("VOICE_AUTH_TIMEOUT_SECONDS", "10"))
+    # Voice activity detection: frames above VOICE_VAD_MIN_RMS (and the noise floor) are speech;
+    # a short pause closes a segment for transcription, a long pause ends the utterance
+    VOICE_VAD_FRAME_MS: int = int(os.getenv("VOICE_VAD_FRAME_MS", "30"))
+    VOICE_VAD_MIN_RMS: float = float(os.getenv("VOICE_VAD_MIN_RMS", "300"))
+    VOICE_SEGMENT_SILENCE_MS: int = int(os.getenv("VOICE_SEGMENT_SILENCE_MS", "300"))
+    VOICE_UTTERANCE_SILENCE_MS: int = int(os.getenv("VOICE_UTTERANCE_SILENCE_MS", "800"))
+    VOICE_MAX_SEGMENT_SECONDS: int = int(os.getenv("VOICE_MAX_SEGMENT_SECONDS", "15"))
     # CORS settings
     CORS_ORIGIN: str = os.getenv("CORS_ORIGIN", "http://localhost:5173")
 
+    # Per chat session cache of the employee data used in the chatbot prompt
+    EMPLOYEE_CONTEXT_TTL_SECONDS: int = int(os.getenv("EMPLOYEE_CONTEXT_TTL_SECONDS", "1800"))
+    EMPLOYEE_CONTEXT_CACHE_SIZE: int = int(os.getenv("EMPLOYEE_CONTEXT_CACHE_SIZE", "5000"))
+
+    # Conversation history sent to the model; older turns are summarized
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+    HISTORY_MAX_TURNS: int = int(os.getenv("HISTORY_MAX_TURNS", "6"))
+
+    # Return per-stage timings of chat turns (Server-Timing header, SSE and voice replies); debug only
+    DEBUG_TIMING_HEADERS: bool = os.getenv("DEBUG_TIMING_HEADERS", "false").lower() == "true"
+
     # Audio settings
     AUDIO_DIR: str = "audios"
     INCOMING_AUDIO_DIR: str = "incoming_audios"
-
-    # OpenAI settings
+    # Per-turn artifacts in AUDIO_DIR and uploads in INCOMING_AUDIO_DIR are
+    # removed after AUDIO_RETENTION_SECONDS or when a directory exceeds AUDIO_DIR_MAX_BYTES
+    AUDIO_RETENTION_SECONDS: int = int(os.getenv("AUDIO_RETENTION_SECONDS", "3600"))
+    AUDIO_DIR_MAX_BYTES: int = int(os.getenv("AUDIO_DIR_MAX_BYTES", str(1024 * 1024 * 1024)))
+    AUDIO_JANITOR_INTERVAL_SECONDS: int = int(os.getenv("AUDIO_JANITOR_INTERVAL_SECONDS", "300"))
+    # "memory" pipes TTS audio through ffmpeg and Rhubarb without temp files;
+    # "files" keeps the MP3 -> WAV -> JSON files in AUDIO_DIR
+    AUDIO_PIPELINE_MODE: str = os.getenv("AUDIO_PIPELINE_MODE", "memory")
+    # ffmpeg / Rhubarb processes: parallelism cap, wait queue and max queue wait
+    # before replying without lipsync
+    AUDIO_TOOL_MAX_CONCURRENCY: int = int(os.getenv("AUDIO_TOOL_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+    AUDIO_TOOL_MAX_QUEUE: int = int(os.getenv("AUDIO_TOOL_MAX_QUEUE", str(4 * (os.cpu_count() or 2))))
+    AUDIO_TOOL_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("AUDIO_TOOL_QUEUE_TIMEOUT_SECONDS", "3"))
+    # Lipsync generator: "rhubarb", "fast" (in-process, from text + audio
+    # envelope) or "fast_refine" (fast, then Rhubarb in the background updates the TTS cache)
+    LIPSYNC_MODE: str = os.getenv("LIPSYNC_MODE", "rhubarb")
+    # "inline" embeds reply audio as base64; "url" returns an audioUrl served
+    # by GET /chatbot/audio/{audio_id} with range support
+    AUDIO_DELIVERY: str = os.getenv("AUDIO_DELIVERY", "inline")
+    # Content-addressed cache of synthesized replies (audio + lipsync)
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "tts_cache")
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # OpenAI settings (defaults for every task below)
     OPENAI_MODEL: str = "gpt-3.5-turbo-0125"
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.6
 
+    # Per-task model routing; unset CHAT_MODEL, CHAT_CLOSING_MODEL,
+    # REPORT_MODEL and REPORT_MAX_TOKENS follow OPENAI_MODEL and MAX_TOKENS
+    CHAT_MODEL: Optional[str] = None
+    CHAT_SMALL_MODEL: str = os.getenv("CHAT_SMALL_MODEL", "gpt-4o-mini")
+    CHAT_CLOSING_MODEL: Optional[str] = None
+    REPORT_MODEL: Optional[str] = None
+    SUMMARY_MODEL: str = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+    REPORT_MAX_TOKENS: Optional[int] = None
+    REPORT_TEMPERATURE: float = float(os.getenv("REPORT_TEMPERATURE", "0.2"))
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+    SUMMARY_TEMPERATURE: float = float(os.getenv("SUMMARY_TEMPERATURE", "0.2"))
+    # Turns before this index use CHAT_SMALL_MODEL unless risk signals appear
+    CHAT_SMALL_TALK_TURNS: int = int(os.getenv("CHAT_SMALL_TALK_TURNS", "2"))
+    # Turns from this index on are treated as closing turns
+    CHAT_CLOSING_TURN: int = int(os.getenv("CHAT_CLOSING_TURN", "6"))
+    # A risk score at or above this in any earlier turn routes to CHAT_MODEL
+    CHAT_RISK_ROUTING_THRESHOLD: float = float(os.getenv("CHAT_RISK_ROUTING_THRESHOLD", "4"))
+
+    # LLM backend: "openai" or "stub" (local deterministic backend for load tests)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")
+    LLM_STUB_LATENCY: str = os.getenv("LLM_STUB_LATENCY", "lognormal")  # fixed, uniform, lognormal
+    LLM_STUB_LATENCY_MS: float = float(os.getenv("LLM_STUB_LATENCY_MS", "800"))
+    LLM_STUB_LATENCY_JITTER_MS: float = float(os.getenv("LLM_STUB_LATENCY_JITTER_MS", "300"))
+    LLM_STUB_ERROR_RATE: float = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+    LLM_STUB_SEED: int = int(os.getenv("LLM_STUB_SEED", "42"))
+
+    # LLM call policy: shared concurrency limit, deadlines, retries, circuit breaker
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "128"))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "5"))
+    LLM_CALL_DEADLINE_SECONDS: float = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "30"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE_SECONDS: float = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+    LLM_BACKOFF_MAX_SECONDS: float = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+    # LLM usage accounting: records are buffered and written to llm_usage in batches
+    LLM_USAGE_FLUSH_SECONDS: float = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "10"))
+    LLM_USAGE_BUFFER_SIZE: int = int(os.getenv("LLM_USAGE_BUFFER_SIZE", "10000"))
+    LLM_USAGE_MEMORY_DAYS: int = int(os.getenv("LLM_USAGE_MEMORY_DAYS", "7"))
+
+    @model_validator(mode="after")
+    def _default_task_models(self) -> "Settings":
+        # Resolved after loading so OPENAI_MODEL from the environment or .env applies
+        self.CHAT_MODEL = self.CHAT_MODEL or self.OPENAI_MODEL
+        self.CHAT_CLOSING_MODEL = self.CHAT_CLOSING_MODEL or self.OPENAI_MODEL
+        self.REPORT_MODEL = self.REPORT_MODEL or self.OPENAI_MODEL
+        if self.REPORT_MAX_TOKENS is None:
+            self.REPORT_MAX_TOKENS = self.MAX_TOKENS
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,29 +1,75 @@
 # app/core/auth.py
+import time
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.core.security import oauth2_scheme
 from app.models.employee import Employee
 from app.schemas.auth import TokenPayload
 from app.config import settings
-from app.models.employee import UserType
+from app.models.employee import UserType, WellnessCheckStatus
+from app.core.cache import TTLCache
+from app.core.revocation import revocation_list
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Column snapshot of authenticated principals, keyed by token subject
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
 
-async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> Employee:
+_PRINCIPAL_FIELDS = (
+    "id",
+    "name",
+    "email",
+    "phone",
+    "department",
+    "position",
+    "user_type",
+    "profile_image",
+    "wellness_check_status",
+    "last_vibe",
+    "immediate_attention",
+)
+
+
+def invalidate_principal(subject: str) -> None:
     """
-    Validate token and return current user
+    Drop the cached principal for a user (call after update, delete or password reset)
+    """
+    principal_cache.invalidate(str(subject))
+
+
+def _load_principal(db: Session, subject: str) -> Optional[Employee]:
+    """
+    Return the principal for a token subject, hitting the database only on a cache miss.
+
+    Cached principals are returned as transient Employee instances that are not
+    attached to any session, so they are safe to share between requests.
+    """
+    snapshot = principal_cache.get(subject)
+    if snapshot is None:
+        employee = db.query(Employee).filter(Employee.id == subject).first()
+        if not employee:
+            return None
+        snapshot = {field: getattr(employee, field) for field in _PRINCIPAL_FIELDS}
+        principal_cache.set(subject, snapshot)
+
+    return Employee(**snapshot)
+
+
+def _decode_token(token: str, show_error: bool = False) -> TokenPayload:
+    """
+    Decode a JWT and reject it if its subject has been revoked since it was issued
     """
     try:
-        print("token here>>>",token)
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
@@ -31,10 +77,28 @@ async def get_current_user(
     except (JWTError, ValidationError) as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials"+str(e),
+            detail="Could not validate credentials" + (str(e) if show_error else ""),
+        )
+
+    if revocation_list.is_revoked(str(token_data.sub), token_data.iat):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(Employee).filter(Employee.id == token_data.sub).first()
+    return token_data
+
+
+async def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Employee:
+    """
+    Validate token and return current user
+    """
+    token_data = _decode_token(token, show_error=True)
+
+    user = _load_principal(db, str(token_data.sub))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,18 +114,9 @@ async def get_current_employee(
     """
     Validate token and return current employee
     """
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
+    token_data = _decode_token(token)
 
-    employee = db.query(Employee).filter(Employee.id == token_data.sub).first()
+    employee = _load_principal(db, str(token_data.sub))
     if not employee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,8 +126,71 @@ async def get_current_employee(
     return employee
 
 
+def authenticate_token(token: str) -> Optional[Employee]:
+    """
+    Validate an access token received outside the Authorization header
+    (e.g. in the first WebSocket message) and return the employee, or None
+    if the token is invalid, revoked or its subject no longer exists.
+
+    Uses its own short-lived DB session so a long-lived caller does not keep
+    a connection checked out.
+    """
+    try:
+        token_data = _decode_token(token)
+    except HTTPException:
+        return None
+
+    db = SessionLocal()
+    try:
+        return _load_principal(db, str(token_data.sub))
+    finally:
+        db.close()
+
+
+async def get_token_principal(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> Employee:
+    """
+    Return the principal described by the token's role and status claims.
+
+    No database query is made for tokens that carry a role claim and were
+    issued within ROLE_CLAIM_TTL_SECONDS. Older tokens, and tokens issued
+    before role claims existed, fall back to the cached lookup, so a role
+    change or deletion takes effect within that window even without an
+    explicit revocation.
+    """
+    token_data = _decode_token(token)
+
+    claims_fresh = (
+        token_data.iat is not None
+        and time.time() - token_data.iat < settings.ROLE_CLAIM_TTL_SECONDS
+    )
+    if token_data.role is None or not claims_fresh:
+        user = _load_principal(db, str(token_data.sub))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+        return user
+
+    try:
+        return Employee(
+            id=token_data.sub,
+            user_type=UserType(token_data.role),
+            wellness_check_status=(
+                WellnessCheckStatus(token_data.status) if token_data.status else None
+            ),
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+
 def get_current_active_admin(
-    current_user: Employee = Depends(get_current_user),
+    current_user: Employee = Depends(get_token_principal),
 ) -> Employee:
     """
     Check if current user is admin
@@ -86,7 +204,7 @@ def get_current_active_admin(
 
 
 def get_current_active_hr(
-    current_user: Employee = Depends(get_current_user),
+    current_user: Employee = Depends(get_token_principal),
 ) -> Employee:
     """
     Check if current user is HR
@@ -0,0 +1,236 @@
+# app/core/llm_backends.py
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from abc import ABC, abstractmethod
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List
+
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """
+    Interface for chat completion backends used by OpenAIClient.
+
+    create_chat_completion takes the same keyword arguments as
+    AsyncOpenAI.chat.completions.create and returns an object of the same
+    shape (or an async iterator of chunks when stream=True).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def create_chat_completion(self, **kwargs: Any) -> Any:
+        ...
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self):
+        # Retries and deadlines are handled by OpenAIClient.caller, not the SDK
+        self.client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=0,
+            timeout=settings.LLM_CALL_DEADLINE_SECONDS,
+        )
+
+    async def create_chat_completion(self, **kwargs: Any) -> Any:
+        return await self.client.chat.completions.create(**kwargs)
+
+
+class StubBackendError(Exception):
+    """Injected failure from the stub backend; retried like a provider 5xx"""
+
+    retryable = True
+
+
+class StubBackend(LLMBackend):
+    """
+    Local deterministic backend for load testing the chatbot pipeline.
+
+    Returns schema-valid analyze_response tool calls, daily reports and plain
+    text completions after a simulated latency drawn from LLM_STUB_LATENCY
+    ("fixed", "uniform" or "lognormal") around LLM_STUB_LATENCY_MS. Replies,
+    latency and injected errors depend only on the request content, the
+    attempt number for that request and LLM_STUB_SEED, never on the order in
+    which concurrent requests arrive.
+    """
+
+    name = "stub"
+
+    REPLIES = [
+        "Thanks for sharing that with me. How have you been feeling about your workload lately?",
+        "I hear you. Is there anything specific that has been causing you stress at work?",
+        "That makes sense. Do you feel you get enough support from your manager and team?",
+        "Thank you for being open with me. How do you feel about your work-life balance right now?",
+        "I appreciate you taking the time to talk today. Remember that HR is always here to help.",
+    ]
+
+    # Bound on the per-request attempt counters kept for retried requests
+    MAX_TRACKED_REQUESTS = 10000
+
+    def __init__(self):
+        self._attempts: Dict[str, int] = {}
+
+    def _request_rng(self, kwargs: Dict[str, Any]) -> random.Random:
+        """
+        Random source for one call, seeded from the request and its attempt
+        number, so a retry of a failed request gets a fresh draw
+        """
+        request = json.dumps(
+            {key: value for key, value in kwargs.items() if key != "stream"},
+            sort_keys=True,
+            default=str,
+        )
+        request_digest = hashlib.sha256(request.encode()).hexdigest()
+        if len(self._attempts) >= self.MAX_TRACKED_REQUESTS:
+            self._attempts.clear()
+        attempt = self._attempts.get(request_digest, 0)
+        self._attempts[request_digest] = attempt + 1
+        seed = f"{settings.LLM_STUB_SEED}:{request_digest}:{attempt}"
+        return random.Random(hashlib.sha256(seed.encode()).digest())
+
+    @staticmethod
+    def _latency_seconds(rng: random.Random) -> float:
+        mean = settings.LLM_STUB_LATENCY_MS / 1000
+        spread = settings.LLM_STUB_LATENCY_JITTER_MS / 1000
+        distribution = settings.LLM_STUB_LATENCY
+        if distribution == "uniform":
+            return max(0.0, rng.uniform(mean - spread, mean + spread))
+        if distribution == "lognormal":
+            # mean is the median; spread controls the tail
+            sigma = spread / mean if mean else 0.0
+            return rng.lognormvariate(0, sigma) * mean
+        return mean
+
+    @staticmethod
+    def _digest(messages: List[Dict[str, Any]]) -> int:
+        last = messages[-1]["content"] if messages else ""
+        return int(hashlib.sha256(str(last).encode()).hexdigest()[:8], 16)
+
+    @staticmethod
+    def _usage(messages: List[Dict[str, Any]], completion: str) -> SimpleNamespace:
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = len(completion) // 4
+        return SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=0),
+        )
+
+    def _analyze_response_arguments(self, messages: List[Dict[str, Any]]) -> str:
+        digest = self._digest(messages)
+        turns = sum(1 for m in messages if m.get("role") == "user")
+        risk_score = digest % 11
+        is_complete = turns >= len(self.REPLIES)
+        return json.dumps(
+            {
+                "content": [{"text": self.REPLIES[min(max(turns, 1), len(self.REPLIES)) - 1]}],
+                "hr_escalation": risk_score >= 7,
+                "escalation_reason": "High risk score" if risk_score >= 7 else "",
+                "suggestions": ["Take regular breaks", "Talk to your manager"],
+                "risk_factors": ["Workload"] if risk_score >= 4 else [],
+                "risk_score": risk_score,
+                "isComplete": is_complete,
+            }
+        )
+
+    @staticmethod
+    def _daily_report() -> str:
+        # Imported lazily to keep the core package free of schema imports at load
+        from app.schemas.analytics import DailyReport
+
+        report = dict(DailyReport.model_config["json_schema_extra"]["example"])
+        report["report_date"] = date.today().isoformat()
+        return json.dumps(report)
+
+    def _completion(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        messages = kwargs.get("messages", [])
+        if kwargs.get("tools"):
+            return {"tool_arguments": self._analyze_response_arguments(messages)}
+        if (kwargs.get("response_format") or {}).get("type") == "json_object":
+            return {"content": self._daily_report()}
+        return {"content": f"Summary of {len(messages)} messages (stub)."}
+
+    async def create_chat_completion(self, **kwargs: Any) -> Any:
+        rng = self._request_rng(kwargs)
+        latency = self._latency_seconds(rng)
+        if rng.random() < settings.LLM_STUB_ERROR_RATE:
+            await asyncio.sleep(latency / 2)
+            raise StubBackendError("Injected stub backend failure")
+
+        messages = kwargs.get("messages", [])
+        completion = self._completion(kwargs)
+        text = completion.get("tool_arguments") or completion["content"]
+        usage = self._usage(messages, text)
+
+        if kwargs.get("stream"):
+            return self._stream(completion, usage, latency)
+
+        await asyncio.sleep(latency)
+        tool_calls = None
+        if "tool_arguments" in completion:
+            tool_calls = [
+                SimpleNamespace(
+                    id="call_stub",
+                    type="function",
+                    function=SimpleNamespace(
+                        name="analyze_response",
+                        arguments=completion["tool_arguments"],
+                    ),
+                )
+            ]
+        message = SimpleNamespace(
+            role="assistant", content=completion.get("content"), tool_calls=tool_calls
+        )
+        return SimpleNamespace(
+            model=kwargs.get("model"),
+            choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+            usage=usage,
+        )
+
+    async def _stream(
+        self, completion: Dict[str, Any], usage: SimpleNamespace, latency: float
+    ) -> AsyncIterator[SimpleNamespace]:
+        # A third of the latency before the first token, the rest spread over chunks
+        await asyncio.sleep(latency / 3)
+
+        text = completion.get("tool_arguments") or completion["content"]
+        pieces = [text[i : i + 16] for i in range(0, len(text), 16)] or [""]
+        delay = (latency * 2 / 3) / len(pieces)
+        for piece in pieces:
+            if "tool_arguments" in completion:
+                delta = SimpleNamespace(
+                    content=None,
+                    tool_calls=[
+                        SimpleNamespace(
+                            index=0, function=SimpleNamespace(arguments=piece)
+                        )
+                    ],
+                )
+            else:
+                delta = SimpleNamespace(content=piece, tool_calls=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+            await asyncio.sleep(delay)
+
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+def get_llm_backend() -> LLMBackend:
+    """
+    Build the backend selected by settings.LLM_BACKEND
+    """
+    if settings.LLM_BACKEND == "stub":
+        logger.warning("Using the stub LLM backend; responses are synthetic")
+        return StubBackend()
+    return OpenAIBackend()
@@ -0,0 +1,243 @@
+# app/core/llm_usage.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.llm_usage import LLMUsage
+
+logger = logging.getLogger(__name__)
+
+
+def usage_field(usage: Any, name: str) -> Any:
+    # Usage may be a typed model or, for fields newer than the SDK, a plain dict
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get(name)
+    return getattr(usage, name, None)
+
+
+@dataclass
+class LLMCall:
+    """
+    One LLM call being measured; pass info to ResilientCaller.call so the
+    number of attempts is captured
+    """
+
+    endpoint: str
+    task: str
+    model: str
+    started: float = field(default_factory=time.perf_counter)
+    info: Dict[str, Any] = field(default_factory=dict)
+    usage: Any = None
+    fallback: bool = False
+    success: bool = False
+
+
+class LLMUsageRecorder:
+    """
+    Record tokens, latency, retries and fallbacks for every LLM call.
+
+    Calls are aggregated in memory per (day, endpoint, model) for a quick view
+    of this process and buffered for the llm_usage table, which is written in
+    batches by run_flush_loop so no request waits on the insert.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: deque = deque(maxlen=settings.LLM_USAGE_BUFFER_SIZE)
+        self._totals: Dict[tuple, Dict[str, Any]] = {}
+
+    def start(self, endpoint: str, task: str, model: str) -> LLMCall:
+        return LLMCall(endpoint=endpoint, task=task, model=model)
+
+    def finish(self, call: LLMCall) -> None:
+        latency_ms = (time.perf_counter() - call.started) * 1000
+        prompt_tokens = usage_field(call.usage, "prompt_tokens") or 0
+        completion_tokens = usage_field(call.usage, "completion_tokens") or 0
+        cached_tokens = (
+            usage_field(usage_field(call.usage, "prompt_tokens_details"), "cached_tokens")
+            or 0
+        )
+        retries = max(0, call.info.get("attempts", 1) - 1)
+
+        row = {
+            "created_at": datetime.now(timezone.utc),
+            "endpoint": call.endpoint,
+            "task": call.task,
+            "model": call.model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "latency_ms": round(latency_ms, 1),
+            "retries": retries,
+            "fallback": call.fallback,
+            "success": call.success,
+        }
+
+        key = (date.today().isoformat(), call.endpoint, call.model)
+        with self._lock:
+            self._pending.append(row)
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = {
+                    "calls": 0,
+                    "errors": 0,
+                    "fallbacks": 0,
+                    "retries": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cached_tokens": 0,
+                    "latency_ms_total": 0.0,
+                    "latency_ms_max": 0.0,
+                }
+                self._prune_totals()
+            totals["calls"] += 1
+            totals["errors"] += 0 if call.success else 1
+            totals["fallbacks"] += 1 if call.fallback else 0
+            totals["retries"] += retries
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cached_tokens"] += cached_tokens
+            totals["latency_ms_total"] += latency_ms
+            totals["latency_ms_max"] = max(totals["latency_ms_max"], latency_ms)
+
+        logger.info(
+            f"LLM call {call.endpoint} ({call.model}): {latency_ms:.0f}ms, "
+            f"{prompt_tokens}+{completion_tokens} tokens, {retries} retries"
+            f"{', fallback' if call.fallback else ''}"
+        )
+
+    def _prune_totals(self) -> None:
+        # Keep only the last LLM_USAGE_MEMORY_DAYS days in memory
+        cutoff = (
+            date.today() - timedelta(days=settings.LLM_USAGE_MEMORY_DAYS)
+        ).isoformat()
+        for key in [k for k in self._totals if k[0] < cutoff]:
+            del self._totals[key]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Per-day, per-endpoint totals recorded by this process
+        """
+        with self._lock:
+            items = sorted(self._totals.items(), reverse=True)
+            return [
+                {
+                    "day": day,
+                    "endpoint": endpoint,
+                    "model": model,
+                    **{k: v for k, v in totals.items() if k != "latency_ms_total"},
+                    "latency_ms_avg": round(totals["latency_ms_total"] / totals["calls"], 1),
+                    "latency_ms_max": round(totals["latency_ms_max"], 1),
+                }
+                for (day, endpoint, model), totals in items
+            ]
+
+    def flush(self, db: Session) -> int:
+        """
+        Write buffered calls to the llm_usage table; returns the number written
+        """
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+        if not rows:
+            return 0
+        try:
+            db.bulk_insert_mappings(LLMUsage, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the rows back (newest calls win if the buffer overflows)
+            with self._lock:
+                self._pending.extendleft(reversed(rows))
+            raise
+        return len(rows)
+
+    def rollups(self, db: Session, days: int) -> List[Dict[str, Any]]:
+        """
+        Per-day, per-endpoint rollups from the llm_usage table
+        """
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        day = func.date(LLMUsage.created_at)
+        rows = (
+            db.query(
+                day.label("day"),
+                LLMUsage.endpoint,
+                LLMUsage.model,
+                func.count(LLMUsage.id).label("calls"),
+                func.sum(case((LLMUsage.success.is_(False), 1), else_=0)).label("errors"),
+                func.sum(case((LLMUsage.fallback.is_(True), 1), else_=0)).label("fallbacks"),
+                func.sum(LLMUsage.retries).label("retries"),
+                func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+                func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+                func.sum(LLMUsage.cached_tokens).label("cached_tokens"),
+                func.avg(LLMUsage.latency_ms).label("latency_ms_avg"),
+                func.percentile_cont(0.95)
+                .within_group(LLMUsage.latency_ms)
+                .label("latency_ms_p95"),
+                func.max(LLMUsage.latency_ms).label("latency_ms_max"),
+            )
+            .filter(LLMUsage.created_at >= since)
+            .group_by(day, LLMUsage.endpoint, LLMUsage.model)
+            .order_by(day.desc(), LLMUsage.endpoint, LLMUsage.model)
+            .all()
+        )
+        return [
+            {
+                "day": str(row.day),
+                "endpoint": row.endpoint,
+                "model": row.model,
+                "calls": row.calls,
+                "errors": int(row.errors or 0),
+                "fallbacks": int(row.fallbacks or 0),
+                "retries": int(row.retries or 0),
+                "prompt_tokens": int(row.prompt_tokens or 0),
+                "completion_tokens": int(row.completion_tokens or 0),
+                "cached_tokens": int(row.cached_tokens or 0),
+                "latency_ms_avg": round(float(row.latency_ms_avg or 0), 1),
+                "latency_ms_p95": round(float(row.latency_ms_p95 or 0), 1),
+                "latency_ms_max": round(float(row.latency_ms_max or 0), 1),
+            }
+            for row in rows
+        ]
+
+    def _flush_with_new_session(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.flush(db)
+        finally:
+            db.close()
+
+    async def run_flush_loop(self) -> None:
+        """
+        Periodically persist buffered calls; runs for the lifetime of the app
+        """
+        while True:
+            await asyncio.sleep(settings.LLM_USAGE_FLUSH_SECONDS)
+            try:
+                await asyncio.to_thread(self._flush_with_new_session)
+            except Exception as e:
+                logger.error(f"Failed to write LLM usage records: {str(e)}")
+
+    async def drain(self) -> None:
+        """
+        Write whatever is still buffered (on shutdown)
+        """
+        try:
+            await asyncio.to_thread(self._flush_with_new_session)
+        except Exception as e:
+            logger.error(f"Failed to write LLM usage records: {str(e)}")
+
+
+llm_usage_recorder = LLMUsageRecorder()
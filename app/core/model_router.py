@@ -0,0 +1,119 @@
+# app/core/model_router.py
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Emotion zones that count as a risk signal (mirrors the prompt thresholds)
+RISK_EMOTION_ZONES = {"Frustrated Zone", "Sad Zone", "Leaning to Sad Zone"}
+
+
+@dataclass(frozen=True)
+class ModelChoice:
+    task: str
+    model: str
+    max_tokens: int
+    temperature: float
+    reason: str = ""
+
+
+class ModelRouter:
+    """
+    Pick the model and generation settings for each LLM task.
+
+    Chat turns start on the small model for small talk and move to the large
+    model as soon as a risk signal appears (risky recent vibe, an earlier
+    escalation or a risk score at or above CHAT_RISK_ROUTING_THRESHOLD in an
+    earlier turn). Closing turns, which produce the final assessment, use
+    CHAT_CLOSING_MODEL.
+    """
+
+    def __init__(self):
+        # session_id -> highest risk score seen in the session so far
+        self._session_risk = TTLCache(
+            max_size=settings.EMPLOYEE_CONTEXT_CACHE_SIZE,
+            ttl_seconds=settings.EMPLOYEE_CONTEXT_TTL_SECONDS,
+        )
+
+    def record_turn(self, session_id: str, ai_response: Dict[str, Any]) -> None:
+        """
+        Remember the risk level of a completed turn for routing later turns
+        """
+        risk = float(ai_response.get("risk_score") or 0)
+        if ai_response.get("hr_escalation"):
+            risk = max(risk, settings.CHAT_RISK_ROUTING_THRESHOLD)
+        previous = self._session_risk.get(session_id) or 0
+        self._session_risk.set(session_id, max(previous, risk))
+
+    def _risk_signal(
+        self, session_id: str, employee_data: Dict[str, Any], escalated: bool
+    ) -> Optional[str]:
+        if escalated:
+            return "session escalated"
+        if (self._session_risk.get(session_id) or 0) >= settings.CHAT_RISK_ROUTING_THRESHOLD:
+            return "risk score in earlier turn"
+        vibes = employee_data.get("vibe_history") or []
+        if vibes and vibes[0].get("emotion") in RISK_EMOTION_ZONES:
+            return "recent vibe in risk zone"
+        return None
+
+    def for_chat_turn(
+        self,
+        session_id: str,
+        turn_index: int,
+        employee_data: Dict[str, Any],
+        escalated: bool = False,
+    ) -> ModelChoice:
+        """
+        Route a chat turn; turn_index is the number of earlier user messages
+        """
+        if turn_index >= settings.CHAT_CLOSING_TURN:
+            return ModelChoice(
+                "closing",
+                settings.CHAT_CLOSING_MODEL,
+                settings.MAX_TOKENS,
+                settings.TEMPERATURE,
+                "closing turn",
+            )
+
+        signal = self._risk_signal(session_id, employee_data, escalated)
+        if signal:
+            return ModelChoice(
+                "chat", settings.CHAT_MODEL, settings.MAX_TOKENS, settings.TEMPERATURE, signal
+            )
+
+        if turn_index < settings.CHAT_SMALL_TALK_TURNS:
+            return ModelChoice(
+                "chat_small",
+                settings.CHAT_SMALL_MODEL,
+                settings.MAX_TOKENS,
+                settings.TEMPERATURE,
+                "small talk",
+            )
+
+        return ModelChoice(
+            "chat", settings.CHAT_MODEL, settings.MAX_TOKENS, settings.TEMPERATURE, "default"
+        )
+
+    def for_report(self) -> ModelChoice:
+        return ModelChoice(
+            "report",
+            settings.REPORT_MODEL,
+            settings.REPORT_MAX_TOKENS,
+            settings.REPORT_TEMPERATURE,
+        )
+
+    def for_summary(self) -> ModelChoice:
+        return ModelChoice(
+            "summary",
+            settings.SUMMARY_MODEL,
+            settings.SUMMARY_MAX_TOKENS,
+            settings.SUMMARY_TEMPERATURE,
+        )
+
+
+model_router = ModelRouter()
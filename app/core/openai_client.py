@@ -1,20 +1,376 @@
 # app/core/openai_client.py
-from openai import AsyncOpenAI
-from typing import List, Dict, Any, Optional
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+from typing import AsyncIterator, List, Dict, Any, Optional
 from app.config import settings
 # from app.models.message import MessageSender
 from sqlalchemy.orm import Session
+import copy
 import json
 import logging
 from openai.types.chat import ChatCompletionMessageParam
 from pydantic import BaseModel, Field
+from app.core.resilience import CircuitBreaker, ConcurrencyLimiter, ResilientCaller
+from app.core.llm_backends import get_llm_backend
+from app.core.model_router import ModelChoice, model_router
+from app.core.llm_usage import usage_field, llm_usage_recorder
 
 logger = logging.getLogger(__name__)
 
 
+ANALYZE_RESPONSE_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "analyze_response",
+        "description": "Analyze the employee response and determine if escalation is needed",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "content": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "text": {
+                                "type": "string",
+                                "description": "The AI response to the employee"
+                            }
+                        }
+                    },
+                    "description": "The AI response to the employee"
+                },
+                "hr_escalation": {
+                    "type": "boolean",
+                    "description": "Whether the employee's message indicates a situation that should be escalated to HR"
+                },
+                "escalation_reason": {
+                    "type": "string",
+                    "description": "The reason for escalation, if recommended"
+                },
+                "suggestions": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Personalized suggestions for the employee"
+                },
+                "risk_factors": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of key risk factors identified"
+                },
+                "risk_score": {
+                    "type": "number",
+                    "description": "Risk score (0-10) based on employee data and conversation"
+                },
+                "isComplete": {
+                    "type": "boolean",
+                    "description": "Whether the conversation has gathered enough information and is complete"
+                }
+            },
+            "required": [
+                "content",
+                "hr_escalation",
+                "suggestions",
+                "risk_factors",
+                "risk_score",
+                "isComplete"
+            ]
+        },
+    },
+}
+
+
+FALLBACK_RESPONSE: Dict[str, Any] = {
+    "content": [{"text": "I'm sorry, I'm having trouble processing that right now. Could you please try again or contact HR directly if you need immediate assistance?"}],
+    "hr_escalation": False,
+    "escalation_reason": "",
+    "suggestions": [
+        "Try again later", 
+        "Contact HR directly",
+        "Seek support from your manager"
+    ],
+    "risk_factors": ["System error"],
+    "risk_score": 0,
+    "isComplete": False
+}
+
+
+# Byte-identical for every request so providers can cache the prompt prefix.
+# Anything employee specific goes in the suffix built by _create_employee_context.
+STATIC_SYSTEM_PROMPT = """You are an empathetic AI assistant named "TIA" working in Deloitte's People Experience team. Your role is to analyze employee data, identify potential concerns, and have meaningful conversations with employees to understand their well-being and provide appropriate suggestions.
+
+CONTEXT:
+The data available for the employee you are talking to is provided as JSON in the EMPLOYEE DATA message that follows these instructions. It may include their vibemeter history, leave, activity tracker, performance, rewards and onboarding data.
+
+REFERENCE THRESHOLDS:
+{
+    "thresholds": {
+        "vibe": {
+            "concerningScore": 2,
+            "criticalScore": 1,
+            "targetEmotionZones": [
+                "Frustrated Zone",
+                "Sad Zone",
+                "Leaning to Sad Zone"
+            ]
+        },
+        "workActivity": {
+            "hours": {
+                "concerning": 8.6,
+                "critical": 9.3
+            },
+            "meetings": {
+                "healthy": 4,
+                "concerning": 7
+            }
+        },
+        "leave": {
+            "insufficient": 6,
+            "healthy": 11
+        },
+        "performance": {
+            "concerning": 1,
+            "promotion": 3
+        },
+        "rewards": {
+            "insufficient": 183,
+            "quarterly": 96
+        },
+        "riskScore": {
+            "weights": {
+                "vibe": 0.4,
+                "workHours": 0.15,
+                "meetings": 0.15,
+                "leave": 0.15,
+                "performance": 0.1,
+                "rewards": 0.05
+            },
+            "levels": {
+                "low": { "min": 0, "max": 3.9 },
+                "medium": { "min": 4, "max": 6.9 },
+                "high": { "min": 7, "max": 10 }
+            },
+            "escalationThreshold": 7
+        }
+    }
+}
+
+YOUR TASK:
+1. Based on the data above, identify potential areas of concern for this employee
+2. Have a conversation with the employee to understand their well-being
+3. Ask relevant questions based on the data patterns
+4. Provide personalized suggestions
+5. Calculate a risk score based on their vibe, responses, and overall data
+6. Return a structured response
+
+CONVERSATION FLOW:
+1. Introduce yourself briefly
+2. Express interest in the employee's well-being
+3. Ask specific questions based on their data patterns (choose 3-5 most relevant questions)
+4. Listen to their feedback
+5. Provide supportive suggestions
+6. Thank them for their time
+
+QUESTION BANK (use where relevant):
+- How have you been feeling at work lately?
+- I notice your Vibe Score indicates you might be feeling [emotion]. Would you like to talk about it?
+- What aspects of your work environment would you like to see improved?
+- Is there anything specific causing you stress or frustration?
+- How do you feel about your work-life balance?
+- Is there any support you need from your manager or team?
+- How comfortable do you feel discussing concerns with your manager?
+- Are there any resources or tools that would help you in your role?
+- What would make you feel more valued or recognized?
+
+RISK SCORE CALCULATION:
+1. Start with a base score of 0
+2. Add points based on different factors:
+   - Vibe Score: Add 3 points if ≤ criticalScore, 2 points if ≤ concerningScore
+   - Emotion Zone: Add 2 points if in targetEmotionZones
+   - Work Hours: Add 2 points if ≥ critical, 1 point if ≥ concerning
+   - Meeting Load: Add 1 point if ≥ concerning
+   - Leave Usage: Add 1 point if ≤ insufficient
+   - Performance: Add 2 points if ≤ concerning
+   - Rewards: Add 0.5 points if ≤ insufficient
+3. Add 1-3 points based on the content of their responses (subjective assessment)
+4. Maximum score is 10
+
+OUTPUT STRUCTURE:
+Your response should include:
+1. Your conversation with the employee
+2. A risk score (0-10)
+3. List of key risk factors identified
+4. Personalized suggestions
+5. Whether HR escalation is recommended (true if risk score ≥ escalationThreshold)
+6. Whether the conversation is complete (true/false)
+"""
+
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a rolling summary of a well-being conversation between an employee and TIA, Deloitte's People Experience assistant.
+Update the current summary with the new messages. Keep every concern, feeling, risk signal and suggestion the employee mentioned, and which questions TIA has already asked.
+Reply with the updated summary only, in at most 150 words."""
+
+
+class _ToolTextExtractor:
+    """
+    Incrementally pull the first "text" string out of streamed tool-call JSON.
+
+    The analyze_response arguments arrive as JSON fragments; this decodes the
+    reply text (content[0].text) as soon as its characters arrive so it can be
+    forwarded to the client before the JSON is complete.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.state = "seek"  # seek -> value -> done
+
+    def feed(self, fragment: str) -> str:
+        self.buffer += fragment
+        out = []
+
+        if self.state == "seek":
+            key = self.buffer.find('"text"', self.pos)
+            if key == -1:
+                return ""
+            quote = self.buffer.find('"', self.buffer.find(":", key + 6) + 1)
+            if self.buffer.find(":", key + 6) == -1 or quote == -1:
+                return ""
+            self.pos = quote + 1
+            self.state = "value"
+
+        while self.state == "value" and self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if char == '"':
+                self.state = "done"
+            elif char == "\\":
+                if self.pos + 1 >= len(self.buffer):
+                    break
+                escaped = self.buffer[self.pos + 1]
+                if escaped == "u":
+                    if self.pos + 6 > len(self.buffer):
+                        break
+                    code = int(self.buffer[self.pos + 2 : self.pos + 6], 16)
+                    if 0xD800 <= code < 0xDC00:
+                        # High surrogate: wait for the low half of the pair
+                        if self.pos + 12 > len(self.buffer):
+                            break
+                        low = int(self.buffer[self.pos + 8 : self.pos + 12], 16)
+                        code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                        self.pos += 6
+                    out.append(chr(code))
+                    self.pos += 6
+                    continue
+                out.append(self._ESCAPES.get(escaped, escaped))
+                self.pos += 2
+                continue
+            else:
+                out.append(char)
+            self.pos += 1
+
+        return "".join(out)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Retry timeouts, connection errors, rate limits (429) and server errors (5xx)
+    """
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return getattr(error, "retryable", False)
+
+
 class OpenAIClient:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        # OpenAI or the local stub, per settings.LLM_BACKEND
+        self.backend = get_llm_backend()
+        # Shared by every LLM call in the process (chat, summaries, reports)
+        self.caller = ResilientCaller(
+            limiter=ConcurrencyLimiter(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_queue=settings.LLM_MAX_QUEUE,
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+            ),
+            is_retryable=_is_retryable,
+            max_retries=settings.LLM_MAX_RETRIES,
+            deadline_seconds=settings.LLM_CALL_DEADLINE_SECONDS,
+            queue_timeout_seconds=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            backoff_base_seconds=settings.LLM_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.LLM_BACKOFF_MAX_SECONDS,
+        )
+        self.prompt_cache_stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+        }
+
+    def _build_messages(
+        self,
+        message: str,
+        previous_messages: List[Dict[str, Any]],
+        employee_data: Dict[str, Any],
+    ) -> List[ChatCompletionMessageParam]:
+        """
+        Format the system prompt, previous messages and the current message for OpenAI.
+
+        previous_messages are chat messages ({"role", "content"}) as produced by
+        ChatHistoryBuilder.
+        """
+        formatted_messages: List[ChatCompletionMessageParam] = [
+            {"role": "system", "content": STATIC_SYSTEM_PROMPT},
+            {"role": "system", "content": self._create_employee_context(employee_data)},
+        ]
+
+        # Add previous messages (already trimmed to the history budget)
+        formatted_messages.extend(previous_messages)
+
+        # Add current message
+        formatted_messages.append({"role": "user", "content": message})
+        return formatted_messages
+
+    def _request_kwargs(
+        self,
+        formatted_messages: List[ChatCompletionMessageParam],
+        model_choice: Optional[ModelChoice] = None,
+    ) -> Dict[str, Any]:
+        if model_choice is None:
+            model_choice = ModelChoice(
+                "chat", settings.CHAT_MODEL, settings.MAX_TOKENS, settings.TEMPERATURE
+            )
+        logger.info(
+            f"Routing {model_choice.task} turn to {model_choice.model} ({model_choice.reason})"
+        )
+        return {
+            "model": model_choice.model,
+            "messages": formatted_messages,
+            "temperature": model_choice.temperature,
+            "max_tokens": model_choice.max_tokens,
+            "tools": [ANALYZE_RESPONSE_TOOL],
+            "tool_choice": {
+                "type": "function",
+                "function": {"name": "analyze_response"},
+            },
+        }
+
+    @staticmethod
+    def _parse_tool_arguments(arguments: str) -> Dict[str, Any]:
+        function_args = json.loads(arguments)
+
+        return {
+            "content": function_args["content"],
+            "hr_escalation": function_args["hr_escalation"],
+            "escalation_reason": function_args.get("escalation_reason", ""),
+            "suggestions": function_args["suggestions"],
+            "risk_factors": function_args["risk_factors"],
+            "risk_score": function_args["risk_score"],
+            "isComplete": function_args["isComplete"]
+        }
 
     async def generate_response(
         self,
@@ -24,292 +380,214 @@ class OpenAIClient:
         message: str,
         previous_messages: List[Dict[str, Any]],
         employee_data: Dict[str, Any],
+        model_choice: Optional[ModelChoice] = None,
     ) -> Dict[str, Any]:
         """
         Generate a response using OpenAI's API with employee context
         """
+        formatted_messages = self._build_messages(
+            message, previous_messages, employee_data
+        )
+        request_kwargs = self._request_kwargs(formatted_messages, model_choice)
+        call = llm_usage_recorder.start(
+            "chatbot.message", model_choice.task if model_choice else "chat", request_kwargs["model"]
+        )
         try:
-            # Format previous messages for OpenAI
-            formatted_messages: List[ChatCompletionMessageParam] = [
-                {"role": "system", "content": self._create_system_prompt(employee_data)}
-            ]
-
-            # Add previous messages
-            for prev_msg in previous_messages:
-                if prev_msg["sender"] == 0:
-                    formatted_messages.append(
-                        {"role": "assistant", "content": prev_msg["content"]}
-                    )
-                else:
-                    formatted_messages.append(
-                        {"role": "user", "content": prev_msg["content"]}
-                    )
-
-            # Add current message
-            formatted_messages.append({"role": "user", "content": message})
-
             # Call OpenAI API with updated format
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",  # or another appropriate model
-                messages=formatted_messages,
-                temperature=0.7,
-                max_tokens=500,
-                tools=[
-                    {
-                        "type": "function",
-                        "function": {
-                            "name": "analyze_response",
-                            "description": "Analyze the employee response and determine if escalation is needed",
-                            "parameters": {
-                                "type": "object",
-                                "properties": {
-                                    "content": {
-                                        "type": "array",
-                                        "items": {
-                                            "type": "object",
-                                            "properties": {
-                                                "text": {
-                                                    "type": "string",
-                                                    "description": "The AI response to the employee"
-                                                }
-                                            }
-                                        },
-                                        "description": "The AI response to the employee"
-                                    },
-                                    "hr_escalation": {
-                                        "type": "boolean",
-                                        "description": "Whether the employee's message indicates a situation that should be escalated to HR"
-                                    },
-                                    "escalation_reason": {
-                                        "type": "string",
-                                        "description": "The reason for escalation, if recommended"
-                                    },
-                                    "suggestions": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "Personalized suggestions for the employee"
-                                    },
-                                    "risk_factors": {
-                                        "type": "array",
-                                        "items": {"type": "string"},
-                                        "description": "List of key risk factors identified"
-                                    },
-                                    "risk_score": {
-                                        "type": "number",
-                                        "description": "Risk score (0-10) based on employee data and conversation"
-                                    },
-                                    "isComplete": {
-                                        "type": "boolean",
-                                        "description": "Whether the conversation has gathered enough information and is complete"
-                                    }
-                                },
-                                "required": [
-                                    "content",
-                                    "hr_escalation",
-                                    "suggestions",
-                                    "risk_factors",
-                                    "risk_score",
-                                    "isComplete"
-                                ]
-                            },
-                        },
-                    }
-                ],
-                tool_choice={
-                    "type": "function",
-                    "function": {"name": "analyze_response"},
-                },
+            response = await self.caller.call(
+                lambda: self.backend.create_chat_completion(**request_kwargs),
+                info=call.info,
             )
+            call.usage = response.usage
+            self._record_prompt_cache_usage(response.usage)
 
             if response.choices[0].message.tool_calls:
                 tool_call = response.choices[0].message.tool_calls[0]
-                function_args = json.loads(tool_call.function.arguments)
-
-                return {
-                    "content": function_args["content"],
-                    "hr_escalation": function_args["hr_escalation"],
-                    "escalation_reason": function_args.get("escalation_reason", ""),
-                    "suggestions": function_args["suggestions"],
-                    "risk_factors": function_args["risk_factors"],
-                    "risk_score": function_args["risk_score"],
-                    "isComplete": function_args["isComplete"]
-                }
+                parsed = self._parse_tool_arguments(tool_call.function.arguments)
+                call.success = True
+                return parsed
             else:
                 raise ValueError("No tool call found in the response")
 
         except Exception as e:
             logger.error(f"Error generating OpenAI response: {str(e)}")
             # Fallback response
-            return {
-                "content": [{"text": "I'm sorry, I'm having trouble processing that right now. Could you please try again or contact HR directly if you need immediate assistance?"}],
-                "hr_escalation": False,
-                "escalation_reason": "",
-                "suggestions": [
-                    "Try again later", 
-                    "Contact HR directly",
-                    "Seek support from your manager"
-                ],
-                "risk_factors": ["System error"],
-                "risk_score": 0,
-                "isComplete": False
-            }
+            call.fallback = True
+            return copy.deepcopy(FALLBACK_RESPONSE)
+        finally:
+            llm_usage_recorder.finish(call)
 
-    def _create_system_prompt(self, employee_data: Dict[str, Any]) -> str:
+    async def generate_response_stream(
+        self,
+        db: Session,
+        employee_id: int,
+        chat_session_id: int,
+        message: str,
+        previous_messages: List[Dict[str, Any]],
+        employee_data: Dict[str, Any],
+        model_choice: Optional[ModelChoice] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Create a system prompt with employee context
+        Stream a response: yields {"type": "token", "text": ...} events as the
+        reply text arrives, then one {"type": "final", "response": ...} event
+        with the complete analyze_response payload.
         """
-        # Extract data safely
-        vibe_data = employee_data.get("vibe_data", {})
-        leave_data = employee_data.get("leave_data", {})
-        performance_data = employee_data.get("performance_data", {})
-        activity_data = employee_data.get("activity_data", {})
-        rewards_data = employee_data.get("rewards_data", {})
-        onboarding_data = employee_data.get("onboarding_data", {})
-
-        system_prompt = f"""
-        You are an empathetic AI assistant named "TIA" working in Deloitte's People Experience team. Your role is to analyze employee data, identify potential concerns, and have meaningful conversations with employees to understand their well-being and provide appropriate suggestions.
-
-        CONTEXT:
-        You have access to the following data for employee {employee_data.get("id", "Unknown")}:
-
-        1. VIBEMETER DATA:
-        - Response Date: {vibe_data.get("date", "Unknown")}
-        - Vibe Score: {vibe_data.get("score", "Unknown")}/5
-        - Emotion Zone: {vibe_data.get("zone", "Unknown")}
-
-        2. LEAVE DATA:
-        - Leave Type: {leave_data.get("type", "Unknown")}
-        - Leave Days Taken (Year to Date): {leave_data.get("days_taken", "Unknown")}
-        - Last Leave Start Date: {leave_data.get("start_date", "Unknown")}
-        - Last Leave End Date: {leave_data.get("end_date", "Unknown")}
-
-        3. ACTIVITY TRACKER:
-        - Average Teams Messages Sent (Last 30 Days): {activity_data.get("avg_teams_messages", "Unknown")}
-        - Average Emails Sent (Last 30 Days): {activity_data.get("avg_emails", "Unknown")}
-        - Average Meetings Attended (Last 30 Days): {activity_data.get("avg_meetings", "Unknown")}
-        - Average Work Hours (Last 30 Days): {activity_data.get("avg_work_hours", "Unknown")}
-
-        4. PERFORMANCE DATA:
-        - Review Period: {performance_data.get("review_period", "Unknown")}
-        - Performance Rating: {performance_data.get("rating", "Unknown")}/5
-        - Manager Feedback Summary: {performance_data.get("feedback", "Not available")}
-        - Promotion Consideration: {performance_data.get("promotion_flag", "Unknown")}
-
-        5. REWARDS & RECOGNITION:
-        - Latest Award Type: {rewards_data.get("latest_award_type", "None")}
-        - Latest Award Date: {rewards_data.get("latest_award_date", "Unknown")}
-        - Reward Points (Year to Date): {rewards_data.get("points", "0")}
-
-        6. ONBOARDING EXPERIENCE:
-        - Joining Date: {onboarding_data.get("joining_date", "Unknown")}
-        - Onboarding Feedback: {onboarding_data.get("feedback", "Not given")}
-        - Mentor Assigned: {onboarding_data.get("mentor_assigned", "Unknown")}
-        - Initial Training Completed: {onboarding_data.get("training_completed", "Unknown")}
-
-        REFERENCE THRESHOLDS:
-        {{
-            "thresholds": {{
-                "vibe": {{
-                    "concerningScore": 2,
-                    "criticalScore": 1,
-                    "targetEmotionZones": [
-                        "Frustrated Zone",
-                        "Sad Zone",
-                        "Leaning to Sad Zone"
-                    ]
-                }},
-                "workActivity": {{
-                    "hours": {{
-                        "concerning": 8.6,
-                        "critical": 9.3
-                    }},
-                    "meetings": {{
-                        "healthy": 4,
-                        "concerning": 7
-                    }}
-                }},
-                "leave": {{
-                    "insufficient": 6,
-                    "healthy": 11
-                }},
-                "performance": {{
-                    "concerning": 1,
-                    "promotion": 3
-                }},
-                "rewards": {{
-                    "insufficient": 183,
-                    "quarterly": 96
-                }},
-                "riskScore": {{
-                    "weights": {{
-                        "vibe": 0.4,
-                        "workHours": 0.15,
-                        "meetings": 0.15,
-                        "leave": 0.15,
-                        "performance": 0.1,
-                        "rewards": 0.05
-                    }},
-                    "levels": {{
-                        "low": {{ "min": 0, "max": 3.9 }},
-                        "medium": {{ "min": 4, "max": 6.9 }},
-                        "high": {{ "min": 7, "max": 10 }}
-                    }},
-                    "escalationThreshold": 7
-                }}
-            }}
-        }}
-
-        YOUR TASK:
-        1. Based on the data above, identify potential areas of concern for this employee
-        2. Have a conversation with the employee to understand their well-being
-        3. Ask relevant questions based on the data patterns
-        4. Provide personalized suggestions
-        5. Calculate a risk score based on their vibe, responses, and overall data
-        6. Return a structured response
-
-        CONVERSATION FLOW:
-        1. Introduce yourself briefly
-        2. Express interest in the employee's well-being
-        3. Ask specific questions based on their data patterns (choose 3-5 most relevant questions)
-        4. Listen to their feedback
-        5. Provide supportive suggestions
-        6. Thank them for their time
-
-        QUESTION BANK (use where relevant):
-        - How have you been feeling at work lately?
-        - I notice your Vibe Score indicates you might be feeling [emotion]. Would you like to talk about it?
-        - What aspects of your work environment would you like to see improved?
-        - Is there anything specific causing you stress or frustration?
-        - How do you feel about your work-life balance?
-        - Is there any support you need from your manager or team?
-        - How comfortable do you feel discussing concerns with your manager?
-        - Are there any resources or tools that would help you in your role?
-        - What would make you feel more valued or recognized?
-
-        RISK SCORE CALCULATION:
-        1. Start with a base score of 0
-        2. Add points based on different factors:
-           - Vibe Score: Add 3 points if ≤ criticalScore, 2 points if ≤ concerningScore
-           - Emotion Zone: Add 2 points if in targetEmotionZones
-           - Work Hours: Add 2 points if ≥ critical, 1 point if ≥ concerning
-           - Meeting Load: Add 1 point if ≥ concerning
-           - Leave Usage: Add 1 point if ≤ insufficient
-           - Performance: Add 2 points if ≤ concerning
-           - Rewards: Add 0.5 points if ≤ insufficient
-        3. Add 1-3 points based on the content of their responses (subjective assessment)
-        4. Maximum score is 10
-
-        OUTPUT STRUCTURE:
-        Your response should include:
-        1. Your conversation with the employee
-        2. A risk score (0-10)
-        3. List of key risk factors identified
-        4. Personalized suggestions
-        5. Whether HR escalation is recommended (true if risk score ≥ escalationThreshold)
-        6. Whether the conversation is complete (true/false)
-    """
-        return system_prompt
+        streamed_text = False
+        formatted_messages = self._build_messages(
+            message, previous_messages, employee_data
+        )
+        request_kwargs = self._request_kwargs(formatted_messages, model_choice)
+        call = llm_usage_recorder.start(
+            "chatbot.message_stream",
+            model_choice.task if model_choice else "chat",
+            request_kwargs["model"],
+        )
+        try:
+            # Hold the concurrency slot for the whole stream, not just the request
+            async with self.caller.limiter.slot(
+                timeout=self.caller.queue_timeout_seconds
+            ):
+                stream = await self.caller.call(
+                    lambda: self.backend.create_chat_completion(
+                        **request_kwargs,
+                        stream=True,
+                        extra_body={"stream_options": {"include_usage": True}},
+                    ),
+                    use_limiter=False,
+                    info=call.info,
+                )
+
+                extractor = _ToolTextExtractor()
+                arguments = ""
+                async for chunk in stream:
+                    # The last chunk carries usage and no choices
+                    usage = getattr(chunk, "usage", None)
+                    if usage is not None:
+                        call.usage = usage
+                    self._record_prompt_cache_usage(usage)
+                    if not chunk.choices:
+                        continue
+                    for tool_call in chunk.choices[0].delta.tool_calls or []:
+                        if not tool_call.function or not tool_call.function.arguments:
+                            continue
+                        arguments += tool_call.function.arguments
+                        text = extractor.feed(tool_call.function.arguments)
+                        if text:
+                            streamed_text = True
+                            yield {"type": "token", "text": text}
+
+                if not arguments:
+                    raise ValueError("No tool call found in the response")
+                parsed = self._parse_tool_arguments(arguments)
+                call.success = True
+
+        except Exception as e:
+            logger.error(f"Error streaming OpenAI response: {str(e)}")
+            call.fallback = True
+            parsed = copy.deepcopy(FALLBACK_RESPONSE)
+            if not streamed_text:
+                yield {"type": "token", "text": parsed["content"][0]["text"]}
+        finally:
+            llm_usage_recorder.finish(call)
+
+        yield {"type": "final", "response": parsed}
+
+    async def summarize_conversation(
+        self, previous_summary: Optional[str], messages: List[Dict[str, str]]
+    ) -> Optional[str]:
+        """
+        Fold older messages into the rolling conversation summary.
+
+        Returns None on failure so the caller keeps the messages unsummarized.
+        """
+        summary_model = model_router.for_summary()
+        transcript = "\n".join(
+            f"{'Employee' if m['role'] == 'user' else 'TIA'}: {m['content']}"
+            for m in messages
+        )
+        call = llm_usage_recorder.start("chatbot.summary", summary_model.task, summary_model.model)
+        try:
+            response = await self.caller.call(
+                lambda: self.backend.create_chat_completion(
+                    model=summary_model.model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                        {
+                            "role": "user",
+                            "content": f"Current summary:\n{previous_summary or 'None'}\n\nNew messages:\n{transcript}",
+                        },
+                    ],
+                    temperature=summary_model.temperature,
+                    max_tokens=summary_model.max_tokens,
+                ),
+                info=call.info,
+            )
+            call.usage = response.usage
+            summary = response.choices[0].message.content.strip()
+            call.success = True
+            return summary
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {str(e)}")
+            call.fallback = True
+            return None
+        finally:
+            llm_usage_recorder.finish(call)
+
+    async def generate_daily_report(self, prompt: str) -> str:
+        """
+        Generate the HR daily report JSON; errors propagate to the caller
+        """
+        report_model = model_router.for_report()
+        call = llm_usage_recorder.start("hr.daily_report", report_model.task, report_model.model)
+        try:
+            response = await self.caller.call(
+                lambda: self.backend.create_chat_completion(
+                    model=report_model.model,
+                    messages=[{"role": "system", "content": prompt}],
+                    temperature=report_model.temperature,
+                    max_tokens=report_model.max_tokens,
+                    response_format={"type": "json_object"},
+                ),
+                info=call.info,
+            )
+            call.usage = response.usage
+            call.success = True
+            return response.choices[0].message.content
+        finally:
+            llm_usage_recorder.finish(call)
+
+    def _create_employee_context(self, employee_data: Dict[str, Any]) -> str:
+        """
+        Create the per-employee suffix that follows the static system prompt
+        """
+        return "EMPLOYEE DATA:\n" + json.dumps(
+            employee_data, separators=(",", ":"), sort_keys=True, default=str
+        )
+
+    def _record_prompt_cache_usage(self, usage: Any) -> None:
+        """
+        Track and log how much of each prompt was served from the provider cache
+        """
+        if usage is None:
+            return
+        prompt_tokens = usage_field(usage, "prompt_tokens") or 0
+        cached_tokens = (
+            usage_field(usage_field(usage, "prompt_tokens_details"), "cached_tokens")
+            or 0
+        )
+
+        stats = self.prompt_cache_stats
+        stats["requests"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["cached_tokens"] += cached_tokens
+        if cached_tokens:
+            stats["cache_hits"] += 1
 
+        logger.info(
+            f"Prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached "
+            f"(hit rate {stats['cache_hits']}/{stats['requests']}, "
+            f"cached tokens {stats['cached_tokens']}/{stats['prompt_tokens']})"
+        )
 
 
 openai_client = OpenAIClient()
\ No newline at end of file
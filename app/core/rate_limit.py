@@ -0,0 +1,93 @@
+# app/core/rate_limit.py
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from app.config import settings
+
+
+class SlidingWindowLimiter:
+    """
+    Count events per key over a sliding time window.
+
+    The number of tracked keys is capped so a flood of distinct keys (e.g.
+    random usernames) cannot grow memory without bound.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._events: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, now: float) -> deque:
+        events = self._events.get(key)
+        if events is None:
+            events = deque()
+            self._events[key] = events
+            while len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        cutoff = now - self.window_seconds
+        while events and events[0] <= cutoff:
+            events.popleft()
+        self._events.move_to_end(key)
+        return events
+
+    def retry_after(self, key: str) -> Optional[int]:
+        """
+        Seconds until the key may try again, or None if it is under the limit
+        """
+        now = time.monotonic()
+        with self._lock:
+            events = self._prune(key, now)
+            if len(events) < self.limit:
+                return None
+            return max(1, int(events[0] + self.window_seconds - now) + 1)
+
+    def hit(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(key, now).append(now)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+
+class LoginThrottle:
+    """
+    Per-IP and per-account failure limiting for login endpoints.
+
+    Only failed attempts count, so an office logging in together from
+    behind one NAT address is never throttled; the per-account limit stops
+    credential stuffing against a single account.
+    """
+
+    def __init__(self):
+        self.ip_failures = SlidingWindowLimiter(
+            settings.LOGIN_MAX_FAILURES_PER_IP, settings.LOGIN_RATE_WINDOW_SECONDS
+        )
+        self.account_failures = SlidingWindowLimiter(
+            settings.LOGIN_MAX_FAILURES_PER_ACCOUNT, settings.LOGIN_RATE_WINDOW_SECONDS
+        )
+
+    def check(self, ip: str, account: str) -> Optional[int]:
+        """
+        Return a Retry-After value if an attempt from ip for account must be rejected
+        """
+        retry_after = self.ip_failures.retry_after(ip)
+        if retry_after is None:
+            retry_after = self.account_failures.retry_after(account)
+        return retry_after
+
+    def record_failure(self, ip: str, account: str) -> None:
+        self.ip_failures.hit(ip)
+        self.account_failures.hit(account)
+
+    def record_success(self, account: str) -> None:
+        self.account_failures.reset(account)
+
+
+login_throttle = LoginThrottle()
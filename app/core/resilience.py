@@ -0,0 +1,208 @@
+# app/core/resilience.py
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class OverloadedError(Exception):
+    """Raised when the call queue is full or a slot could not be acquired in time"""
+
+
+class CircuitOpenError(Exception):
+    """Raised while the circuit breaker is shedding load"""
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore with a bounded wait queue.
+
+    At most max_concurrency calls run at once and at most max_queue callers
+    wait for a slot; anyone beyond that is rejected immediately instead of
+    piling up.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.active = 0
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise OverloadedError("Too many queued calls")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise OverloadedError("Timed out waiting for a free slot")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failures in a row the circuit opens and calls are
+    rejected for reset_seconds; then a single trial call is let through and
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    @contextmanager
+    def guard(self):
+        """
+        Admit one call or raise CircuitOpenError. A half-open trial is
+        released however the call ends (including cancellation), so an
+        unrecorded trial cannot leave the circuit stuck half-open.
+        """
+        was_trial_in_flight = self._trial_in_flight
+        if not self.allow():
+            raise CircuitOpenError("Service is unavailable, shedding load")
+        is_trial = self._trial_in_flight and not was_trial_in_flight
+        try:
+            yield
+        finally:
+            if is_trial:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Circuit breaker opened after repeated failures")
+            self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Run calls to an external service through a shared concurrency limiter,
+    an overall deadline, jittered exponential backoff on retryable errors and
+    a circuit breaker.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        breaker: CircuitBreaker,
+        is_retryable: Callable[[BaseException], bool],
+        max_retries: int,
+        deadline_seconds: float,
+        queue_timeout_seconds: float,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.is_retryable = is_retryable
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform between 0 and the exponential cap
+        cap = min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        use_limiter: bool = True,
+        info: Optional[Dict[str, Any]] = None,
+    ) -> T:
+        """
+        Call fn() under the resilience policy.
+
+        Pass use_limiter=False when the caller already holds a limiter slot
+        (e.g. for the lifetime of a stream). If info is given, the number of
+        attempts made is written to info["attempts"].
+        """
+        # The slot is taken first: a half-open trial must not be admitted
+        # and then rejected by the limiter
+        if use_limiter:
+            async with self.limiter.slot(timeout=self.queue_timeout_seconds):
+                with self.breaker.guard():
+                    return await self._call_with_retries(fn, info)
+        with self.breaker.guard():
+            return await self._call_with_retries(fn, info)
+
+    async def _call_with_retries(
+        self, fn: Callable[[], Awaitable[T]], info: Optional[Dict[str, Any]]
+    ) -> T:
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            if info is not None:
+                info["attempts"] = attempt + 1
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError("Call deadline exceeded")
+                result = await asyncio.wait_for(fn(), remaining)
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                retryable = isinstance(e, asyncio.TimeoutError) or self.is_retryable(e)
+                if not retryable:
+                    # The service answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+
+                delay = self._backoff(attempt)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise
+
+                logger.warning(
+                    f"Retryable error ({type(e).__name__}), retrying in {delay:.2f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
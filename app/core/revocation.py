@@ -0,0 +1,100 @@
+# app/core/revocation.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.token_revocation import TokenRevocation
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationList:
+    """
+    In-memory view of the token_revocations table.
+
+    Maps a token subject to the time before which all of its tokens are
+    rejected. Only revocations younger than the token lifetime are kept, so
+    the set stays small. It is reloaded periodically so revocations made on
+    other workers are picked up.
+    """
+
+    def __init__(self):
+        self._revoked_after: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.last_refresh: Optional[float] = None
+
+    def is_revoked(self, subject: str, issued_at: Optional[int]) -> bool:
+        revoked_after = self._revoked_after.get(subject)
+        if revoked_after is None:
+            return False
+        # Tokens without an iat claim predate revocation support. iat has
+        # whole-second precision and revoked_after is floored to match; a
+        # token issued in the revocation's own second counts as issued after
+        # it, so logging in again right after a reset is not locked out
+        return issued_at is None or issued_at < revoked_after
+
+    def refresh(self, db: Session) -> None:
+        """
+        Reload revocations that can still affect unexpired tokens
+        """
+        horizon = datetime.now(timezone.utc) - timedelta(
+            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        )
+        rows = (
+            db.query(TokenRevocation.subject, func.max(TokenRevocation.revoked_at))
+            .filter(TokenRevocation.revoked_at >= horizon)
+            .group_by(TokenRevocation.subject)
+            .all()
+        )
+        revoked_after = {
+            str(subject).strip(): math.floor(revoked_at.timestamp())
+            for subject, revoked_at in rows
+        }
+        with self._lock:
+            self._revoked_after = revoked_after
+            self.last_refresh = time.time()
+
+    def revoke(self, db: Session, subject: str, reason: str = "") -> None:
+        """
+        Revoke every token issued so far for a subject (forced logout or role change)
+        """
+        revoked_at = datetime.now(timezone.utc)
+        db.add(TokenRevocation(subject=subject, revoked_at=revoked_at, reason=reason))
+        db.commit()
+        with self._lock:
+            self._revoked_after[subject] = math.floor(revoked_at.timestamp())
+
+    def load(self) -> None:
+        """
+        Load the revocation list with a short-lived session. Called once at
+        startup before requests are served, since is_revoked() accepts every
+        token until the list has been loaded.
+        """
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+    async def run_refresh_loop(self) -> None:
+        """
+        Periodically reload the revocation list; runs for the lifetime of the app
+        """
+        while True:
+            await asyncio.sleep(settings.REVOCATION_REFRESH_SECONDS)
+            try:
+                await asyncio.to_thread(self.load)
+            except Exception as e:
+                logger.error(f"Failed to refresh token revocation list: {str(e)}")
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,105 @@
+# app/core/subprocess_scheduler.py
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.config import settings
+from app.core.resilience import ConcurrencyLimiter, OverloadedError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SubprocessScheduler:
+    """
+    Cap how many external tool processes (ffmpeg, Rhubarb) run at once.
+
+    Runs beyond max_concurrency wait in a bounded queue; when the queue is
+    full or the wait exceeds queue_timeout_seconds, run() raises
+    OverloadedError so the caller can degrade (e.g. skip lipsync) instead of
+    piling up processes. Queue wait, run time and outcomes are tracked per tool.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_seconds: float):
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _tool_stats(self, tool: str) -> Dict[str, float]:
+        stats = self._stats.get(tool)
+        if stats is None:
+            stats = self._stats[tool] = {
+                "runs": 0,
+                "failures": 0,
+                "rejected": 0,
+                "queue_wait_ms_total": 0.0,
+                "queue_wait_ms_max": 0.0,
+                "run_ms_total": 0.0,
+                "run_ms_max": 0.0,
+            }
+        return stats
+
+    async def run(
+        self,
+        tool: str,
+        fn: Callable[[], Awaitable[T]],
+        succeeded: Callable[[T], bool] = bool,
+    ) -> T:
+        """
+        Run fn() once a slot is free; succeeded(result) decides whether the
+        run counts as a failure
+        """
+        stats = self._tool_stats(tool)
+        queued_at = time.perf_counter()
+        try:
+            async with self.limiter.slot(timeout=self.queue_timeout_seconds):
+                started_at = time.perf_counter()
+                wait_ms = (started_at - queued_at) * 1000
+                stats["queue_wait_ms_total"] += wait_ms
+                stats["queue_wait_ms_max"] = max(stats["queue_wait_ms_max"], wait_ms)
+
+                ok = False
+                try:
+                    result = await fn()
+                    ok = succeeded(result)
+                    return result
+                finally:
+                    run_ms = (time.perf_counter() - started_at) * 1000
+                    stats["runs"] += 1
+                    stats["failures"] += 0 if ok else 1
+                    stats["run_ms_total"] += run_ms
+                    stats["run_ms_max"] = max(stats["run_ms_max"], run_ms)
+        except OverloadedError as e:
+            stats["rejected"] += 1
+            logger.warning(f"{tool} rejected: {str(e)}")
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        tools = {}
+        for tool, stats in self._stats.items():
+            runs = stats["runs"] or 1
+            tools[tool] = {
+                "runs": int(stats["runs"]),
+                "failures": int(stats["failures"]),
+                "rejected": int(stats["rejected"]),
+                "failure_rate": round(stats["failures"] / runs, 4),
+                "queue_wait_ms_avg": round(stats["queue_wait_ms_total"] / runs, 1),
+                "queue_wait_ms_max": round(stats["queue_wait_ms_max"], 1),
+                "run_ms_avg": round(stats["run_ms_total"] / runs, 1),
+                "run_ms_max": round(stats["run_ms_max"], 1),
+            }
+        return {
+            "max_concurrency": self.limiter.max_concurrency,
+            "max_queue": self.limiter.max_queue,
+            "active": self.limiter.active,
+            "waiting": self.limiter.waiting,
+            "tools": tools,
+        }
+
+
+audio_tool_scheduler = SubprocessScheduler(
+    max_concurrency=settings.AUDIO_TOOL_MAX_CONCURRENCY,
+    max_queue=settings.AUDIO_TOOL_MAX_QUEUE,
+    queue_timeout_seconds=settings.AUDIO_TOOL_QUEUE_TIMEOUT_SECONDS,
+)
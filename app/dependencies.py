@@ -7,6 +7,7 @@ from app.core.auth import (
     get_current_active_admin,
     get_current_active_hr,
     get_current_employee,
+    get_token_principal,
 )
 from app.models.employee import Employee
 
@@ -17,4 +18,5 @@ __all__ = [
     "get_current_active_admin",
     "get_current_active_hr",
     "get_current_employee",
+    "get_token_principal",
 ]
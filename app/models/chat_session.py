@@ -15,6 +15,8 @@ class ChatSession(Base):
     start_time = Column(DateTime(timezone=True), default=func.now())
     end_time = Column(DateTime(timezone=True))
     summary = Column(Text)
+    # Number of chat messages already folded into summary
+    summarized_messages = Column(Integer, default=0)
     escalated = Column(Boolean, default=False)
     suggestions = Column(Text)
     risk_score = Column(Integer)
@@ -0,0 +1,21 @@
+# app/models/llm_usage.py
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now(), index=True)
+    endpoint = Column(String(50), nullable=False)
+    task = Column(String(30), nullable=False)
+    model = Column(String(50), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False)
+    retries = Column(Integer, nullable=False, default=0)
+    fallback = Column(Boolean, nullable=False, default=False)
+    success = Column(Boolean, nullable=False, default=True)
@@ -0,0 +1,14 @@
+# app/models/token_revocation.py
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Every token for this subject issued at or before revoked_at is rejected
+    subject = Column(String(10), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    reason = Column(String(100))
@@ -14,6 +14,30 @@ class EmployeeAlert(BaseModel):
     recommended_action: str
 
 
+class BulkAlertRequest(BaseModel):
+    # Explicit recipients, or everyone flagged for immediate attention
+    employee_ids: Optional[List[str]] = None
+    immediate_attention: bool = False
+
+
+class BulkAlertResult(BaseModel):
+    employee_id: str
+    email: Optional[str] = None
+    status: str  # "pending", "sent", "failed" or "not_found"
+
+
+class BulkAlertJobStatus(BaseModel):
+    job_id: str
+    status: str  # "running" or "completed"
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    requested: int
+    pending: int
+    sent: int
+    failed: int
+    results: List[BulkAlertResult]
+
+
 class EmployeeSessionAnalyticsNew(BaseModel):
     employee_id: str
     session_id: str
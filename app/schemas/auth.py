@@ -8,6 +8,10 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    role: Optional[str] = None
+    status: Optional[str] = None
+    iat: Optional[int] = None
+    jti: Optional[str] = None
 
 
 class EmployeeLogin(BaseModel):
@@ -64,6 +64,9 @@ class ChatSessionResponse(ChatSessionBase):
     session_id: str
     start_time: datetime
     end_time: Optional[datetime] = None
+    # Pre-rendered bot utterances ({text, audio, lipsync, facialExpression, animation})
+    intro_messages: Optional[List[Dict[str, Any]]] = None
+    farewell_message: Optional[Dict[str, Any]] = None
 
     class Config:
         orm_mode = True
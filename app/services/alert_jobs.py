@@ -0,0 +1,116 @@
+# app/services/alert_jobs.py
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from app.config import settings
+from app.models.employee import Employee
+from app.services.email import EmailService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkAlertJob:
+    """
+    One bulk alert send; results hold a status per recipient
+    ("pending", "sent", "failed" or "not_found")
+    """
+
+    job_id: str
+    results: List[Dict[str, Any]]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    finished: Optional[float] = None  # monotonic, for retention
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts = {"pending": 0, "sent": 0, "failed": 0}
+        for result in self.results:
+            if result["status"] in counts:
+                counts[result["status"]] += 1
+        return {
+            "job_id": self.job_id,
+            "status": "completed" if self.finished_at else "running",
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "requested": len(self.results),
+            **counts,
+            "results": [dict(result) for result in self.results],
+        }
+
+
+class BulkAlertJobs:
+    """
+    Bulk alert sends running in the background of this process.
+
+    Jobs live in memory (the app runs as a single uvicorn worker); finished
+    jobs are kept for retention_seconds so their status can be fetched.
+    """
+
+    def __init__(self, retention_seconds: float):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, BulkAlertJob] = {}
+        # Running jobs; referenced so they are not collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and now - job.finished > self.retention_seconds:
+                del self._jobs[job_id]
+
+    def start(self, employees: List[Employee], missing_ids: List[str]) -> BulkAlertJob:
+        """
+        Start sending the alert to employees; missing_ids are reported as not_found
+        """
+        self._prune()
+        results = [
+            {"employee_id": str(employee.id), "email": employee.email, "status": "pending"}
+            for employee in employees
+        ] + [
+            {"employee_id": employee_id, "email": None, "status": "not_found"}
+            for employee_id in missing_ids
+        ]
+        job = BulkAlertJob(job_id=uuid.uuid4().hex, results=results)
+        self._jobs[job.job_id] = job
+
+        task = asyncio.create_task(self._run(job, employees))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: BulkAlertJob, employees: List[Employee]) -> None:
+        def on_result(index: int, ok: bool) -> None:
+            job.results[index]["status"] = "sent" if ok else "failed"
+
+        try:
+            await EmailService.send_bulk_alerts(employees, on_result)
+        except Exception as e:
+            logger.error(f"Bulk alert job {job.job_id} failed: {str(e)}")
+            for result in job.results:
+                if result["status"] == "pending":
+                    result["status"] = "failed"
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.finished = time.monotonic()
+        logger.info(f"Bulk alert job {job.job_id} finished: {len(employees)} recipients")
+
+    def get(self, job_id: str) -> Optional[BulkAlertJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def close(self) -> None:
+        """
+        Stop running jobs (on shutdown)
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=5)
+
+
+bulk_alert_jobs = BulkAlertJobs(settings.ALERT_JOB_RETENTION_SECONDS)
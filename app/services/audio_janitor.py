@@ -0,0 +1,105 @@
+# app/services/audio_janitor.py
+import asyncio
+import fnmatch
+import logging
+import os
+import time
+from typing import List, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AudioJanitor:
+    """
+    Enforce age and size limits on audio artifact directories.
+
+    Each managed directory is a (path, pattern) pair; only files matching the
+    pattern are touched, so static assets kept alongside per-turn artifacts
+    survive. Files older than max_age_seconds are removed, then the oldest
+    files are removed until the directory is under max_bytes. Files younger
+    than grace_seconds are never removed, as a turn may still be using them.
+    """
+
+    def __init__(
+        self,
+        directories: List[Tuple[str, str]],
+        max_age_seconds: float,
+        max_bytes: int,
+        grace_seconds: float = 60,
+    ):
+        self.directories = directories
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.grace_seconds = grace_seconds
+
+    def _sweep_directory(self, path: str, pattern: str, now: float) -> Tuple[int, int]:
+        if not os.path.isdir(path):
+            return 0, 0
+
+        files = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if not fnmatch.fnmatch(entry.name, pattern):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = removed_bytes = 0
+        for mtime, size, file_path in files:
+            age = now - mtime
+            if age < self.grace_seconds:
+                break
+            if age < self.max_age_seconds and total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            removed_bytes += size
+        return removed, removed_bytes
+
+    def sweep(self) -> Tuple[int, int]:
+        """
+        Run one pass over every directory; returns (files removed, bytes freed)
+        """
+        now = time.time()
+        removed = removed_bytes = 0
+        for path, pattern in self.directories:
+            count, size = self._sweep_directory(path, pattern, now)
+            removed += count
+            removed_bytes += size
+        if removed:
+            logger.info(f"Audio janitor removed {removed} files ({removed_bytes} bytes)")
+        return removed, removed_bytes
+
+    async def run_loop(self) -> None:
+        """
+        Periodically sweep the audio directories; runs for the lifetime of the app
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Audio janitor sweep failed: {str(e)}")
+            await asyncio.sleep(settings.AUDIO_JANITOR_INTERVAL_SECONDS)
+
+
+audio_janitor = AudioJanitor(
+    directories=[
+        (settings.AUDIO_DIR, "message_*"),
+        (settings.INCOMING_AUDIO_DIR, "*"),
+    ],
+    max_age_seconds=settings.AUDIO_RETENTION_SECONDS,
+    max_bytes=settings.AUDIO_DIR_MAX_BYTES,
+)
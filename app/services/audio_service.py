@@ -2,14 +2,23 @@ import os
 import json
 import base64
 import asyncio
+import shutil
+import struct
+import tempfile
 import time
-from typing import Dict, Any, Tuple
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
 import logging
 
 from app.config import settings
+from app.core.resilience import OverloadedError
+from app.core.subprocess_scheduler import audio_tool_scheduler
+from app.services import fast_lipsync
 
 logger = logging.getLogger(__name__)
 
+# Called with (base64_audio, refined_lipsync) once Rhubarb finishes in fast_refine mode
+RefineCallback = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
 class AudioService:
     def __init__(self):
         self.audio_dir = settings.AUDIO_DIR
@@ -17,6 +26,30 @@ class AudioService:
         # Create audio directory if it doesn't exist
         if not os.path.exists(self.audio_dir):
             os.makedirs(self.audio_dir)
+        # Directory of "fd<N>.wav" symlinks to /proc/self/fd/<N>, created on first use
+        self._fd_link_dir: Optional[str] = None
+        # Background Rhubarb refinements (fast_refine mode); referenced so they are not collected
+        self._refine_tasks: Set[asyncio.Task] = set()
+
+    async def _run_tool(self, tool: str, *args: str, **kwargs: Any) -> Tuple[int, bytes, bytes]:
+        """
+        Run an external tool under the shared subprocess scheduler.
+
+        Returns:
+            Tuple of (returncode, stdout, stderr). Raises OverloadedError when
+            no slot frees up in time.
+        """
+        async def run() -> Tuple[int, bytes, bytes]:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **kwargs
+            )
+            stdout, stderr = await process.communicate()
+            return process.returncode, stdout, stderr
+
+        return await audio_tool_scheduler.run(tool, run, lambda result: result[0] == 0)
 
     async def convert_mp3_to_wav(self, mp3_path: str, wav_path: str) -> bool:
         """
@@ -34,20 +67,20 @@ class AudioService:
             logger.info(f"Starting conversion for {mp3_path}")
             
             # Run ffmpeg command to convert MP3 to WAV
-            process = await asyncio.create_subprocess_exec(
-                "ffmpeg", "-y", "-i", mp3_path, wav_path,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            returncode, stdout, stderr = await self._run_tool(
+                "ffmpeg", "ffmpeg", "-y", "-i", mp3_path, wav_path
             )
-            stdout, stderr = await process.communicate()
             
-            if process.returncode == 0:
+            if returncode == 0:
                 logger.info(f"Conversion done in {(time.time() - start_time) * 1000:.0f}ms")
                 return True
             else:
                 logger.error(f"Error converting audio: {stderr.decode()}")
                 return False
                 
+        except OverloadedError:
+            logger.warning("Skipping MP3 to WAV conversion, audio tools are overloaded")
+            return False
         except Exception as e:
             logger.error(f"Exception in convert_mp3_to_wav: {str(e)}")
             return False
@@ -67,56 +100,327 @@ class AudioService:
             start_time = time.time()
             
             # Run Rhubarb command to generate lipsync data
-            process = await asyncio.create_subprocess_exec(
-                "./bin/rhubarb", "-f", "json", "-o", json_path, wav_path, "-r", "phonetic",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            returncode, stdout, stderr = await self._run_tool(
+                "rhubarb", "./bin/rhubarb", "-f", "json", "-o", json_path, wav_path, "-r", "phonetic"
             )
-            stdout, stderr = await process.communicate()
             
-            if process.returncode == 0:
+            if returncode == 0:
                 logger.info(f"Lip sync done in {(time.time() - start_time) * 1000:.0f}ms")
                 return True
             else:
                 logger.error(f"Error generating lipsync: {stderr.decode()}")
                 return False
                 
+        except OverloadedError:
+            logger.warning("Skipping lipsync, audio tools are overloaded")
+            return False
         except Exception as e:
             logger.error(f"Exception in generate_lipsync: {str(e)}")
             return False
 
-    async def process_audio_for_message(self, message_index: int, text: str) -> Tuple[str, Dict[str, Any]]:
+    async def process_audio_for_message(
+        self, message_id: str, text: str, on_refined: Optional[RefineCallback] = None
+    ) -> Tuple[str, Dict[str, Any]]:
         """
         Process audio for a message, including TTS, conversion, and lipsync.
         
         This is a placeholder that would normally call elevenlabs_service.
         
         Args:
-            message_index: Index of the message.
+            message_id: Unique id of the message's audio artifacts.
             text: Text of the message.
             
         Returns:
             Tuple of (base64_audio, lipsync_data).
         """
-        mp3_path = os.path.join(self.audio_dir, f"message_{message_index}.mp3")
-        wav_path = os.path.join(self.audio_dir, f"message_{message_index}.wav")
-        json_path = os.path.join(self.audio_dir, f"message_{message_index}.json")
+        mp3_path = os.path.join(self.audio_dir, f"message_{message_id}.mp3")
+        wav_path = os.path.join(self.audio_dir, f"message_{message_id}.wav")
+        json_path = os.path.join(self.audio_dir, f"message_{message_id}.json")
         
         # First we'd generate the MP3 using elevenlabs_service
         # This is handled elsewhere
         
-        # Then convert MP3 to WAV
-        await self.convert_mp3_to_wav(mp3_path, wav_path)
-        
-        # Generate lipsync data
-        await self.generate_lipsync(wav_path, json_path)
-        
-        # Read audio and lipsync data
+        # Then convert MP3 to WAV and generate lipsync data; when either step
+        # fails (e.g. the audio tools are overloaded) the audio is returned
+        # without lipsync
+        converted = await self.convert_mp3_to_wav(mp3_path, wav_path)
         audio_base64 = await self.audio_file_to_base64(mp3_path)
-        lipsync_data = await self.read_json_transcript(json_path)
+
+        if not converted:
+            lipsync_data = {}
+        elif settings.LIPSYNC_MODE == "rhubarb":
+            # Generate lipsync data
+            lipsync_ready = await self.generate_lipsync(wav_path, json_path)
+            lipsync_data = await self.read_json_transcript(json_path) if lipsync_ready else {}
+        else:
+            wav = await asyncio.to_thread(self._read_bytes, wav_path)
+            lipsync_data = await self.lipsync_for_reply(wav, text, audio_base64, on_refined)
         
         return audio_base64, lipsync_data
 
+    async def transcode_stream(
+        self, first_chunk: bytes, chunks: "asyncio.Queue[Optional[bytes]]"
+    ) -> Optional[bytes]:
+        """
+        Convert a streamed MP3 to WAV bytes by piping it through ffmpeg.
+
+        first_chunk and then the chunks from the queue (until None) are
+        written to ffmpeg's stdin as they arrive. The caller waits for the
+        first chunk before calling this, so the ffmpeg slot never covers the
+        wait for the TTS response to start.
+
+        Returns:
+            WAV bytes, or None if ffmpeg failed. Raises OverloadedError when
+            no ffmpeg slot frees up in time.
+        """
+        return await audio_tool_scheduler.run(
+            "ffmpeg",
+            lambda: self._transcode_stream(first_chunk, chunks),
+            lambda wav: wav is not None,
+        )
+
+    async def _transcode_stream(
+        self, first_chunk: bytes, chunks: "asyncio.Queue[Optional[bytes]]"
+    ) -> Optional[bytes]:
+        start_time = time.time()
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+            "-map_metadata", "-1", "-f", "wav", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        async def feed() -> None:
+            chunk: Optional[bytes] = first_chunk
+            try:
+                while chunk is not None:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+                    chunk = await chunks.get()
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg exited early; its return code reports why
+                pass
+            finally:
+                process.stdin.close()
+
+        try:
+            _, wav, stderr = await asyncio.gather(
+                feed(), process.stdout.read(), process.stderr.read()
+            )
+            await process.wait()
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+        if process.returncode != 0:
+            logger.error(f"Error converting audio: {stderr.decode()}")
+            return None
+
+        logger.info(f"In-memory conversion done in {(time.time() - start_time) * 1000:.0f}ms")
+        return self._fix_wav_header(wav)
+
+    @staticmethod
+    def _fix_wav_header(wav: bytes) -> bytes:
+        """
+        Fill in the RIFF and data chunk sizes, which ffmpeg cannot seek back
+        to write when the output is a pipe.
+        """
+        if len(wav) < 12 or wav[:4] != b"RIFF" or wav[8:12] != b"WAVE":
+            return wav
+        fixed = bytearray(wav)
+        struct.pack_into("<I", fixed, 4, len(fixed) - 8)
+        offset = 12
+        while offset + 8 <= len(fixed):
+            chunk_id = bytes(fixed[offset:offset + 4])
+            if chunk_id == b"data":
+                struct.pack_into("<I", fixed, offset + 4, len(fixed) - offset - 8)
+                break
+            (size,) = struct.unpack_from("<I", fixed, offset + 4)
+            offset += 8 + size + (size & 1)
+        return bytes(fixed)
+
+    def _fd_path(self, fd: int) -> str:
+        """
+        Path with a .wav extension that opens the given inherited fd.
+
+        Rhubarb picks its decoder from the file extension, so it cannot be
+        pointed at /proc/self/fd/<N> directly; a symlink named fd<N>.wav to
+        that path works because /proc/self resolves in the child process.
+        The fd is held open by the caller, so no other call uses the same link
+        at the same time; the caller removes it when done.
+        """
+        if self._fd_link_dir is None:
+            self._fd_link_dir = tempfile.mkdtemp(prefix="rhubarb-fds-")
+        link = os.path.join(self._fd_link_dir, f"fd{fd}.wav")
+        if not os.path.lexists(link):
+            try:
+                os.symlink(f"/proc/self/fd/{fd}", link)
+            except FileExistsError:
+                pass
+        return link
+
+    async def lipsync_from_wav(self, wav: bytes) -> Dict[str, Any]:
+        """
+        Generate lipsync data for in-memory WAV bytes.
+
+        The WAV is handed to Rhubarb through a memfd and the JSON is read from
+        its stdout, so nothing touches the disk. Falls back to a temporary
+        file where memfd is not available.
+
+        Returns:
+            JSON lipsync data, or {} on failure.
+        """
+        start_time = time.time()
+        fd = None
+        fd_link = None
+        temp_path = None
+        try:
+            if hasattr(os, "memfd_create"):
+                fd = os.memfd_create("lipsync.wav")
+                with open(fd, "wb", closefd=False) as memfile:
+                    memfile.write(wav)
+                wav_path = fd_link = self._fd_path(fd)
+                pass_fds = (fd,)
+            else:
+                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+                    tmp.write(wav)
+                    temp_path = wav_path = tmp.name
+                pass_fds = ()
+
+            returncode, stdout, stderr = await self._run_tool(
+                "rhubarb", "./bin/rhubarb", "-f", "json", wav_path, "-r", "phonetic",
+                pass_fds=pass_fds
+            )
+
+            if returncode != 0:
+                logger.error(f"Error generating lipsync: {stderr.decode()}")
+                return {}
+            logger.info(f"Lip sync done in {(time.time() - start_time) * 1000:.0f}ms")
+            return json.loads(stdout)
+
+        except OverloadedError:
+            logger.warning("Skipping lipsync, audio tools are overloaded")
+            return {}
+        except Exception as e:
+            logger.error(f"Exception in lipsync_from_wav: {str(e)}")
+            return {}
+        finally:
+            if fd_link is not None:
+                try:
+                    os.unlink(fd_link)
+                except OSError:
+                    pass
+            if fd is not None:
+                os.close(fd)
+            if temp_path is not None:
+                os.remove(temp_path)
+
+    async def lipsync_for_reply(
+        self,
+        wav: bytes,
+        text: str,
+        audio_base64: str,
+        on_refined: Optional[RefineCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate lipsync data according to settings.LIPSYNC_MODE.
+
+        "rhubarb" runs Rhubarb; "fast" derives the cues in-process from the
+        text and the audio envelope; "fast_refine" returns the fast cues and
+        runs Rhubarb in the background, passing its result to on_refined.
+
+        Returns:
+            JSON lipsync data, or {} on failure.
+        """
+        mode = settings.LIPSYNC_MODE
+        if mode == "rhubarb":
+            return await self.lipsync_from_wav(wav)
+
+        start_time = time.time()
+        try:
+            lipsync_data = await asyncio.to_thread(fast_lipsync.generate, text, wav)
+        except Exception as e:
+            logger.error(f"Exception in fast lipsync, falling back to Rhubarb: {str(e)}")
+            return await self.lipsync_from_wav(wav)
+        logger.info(f"Fast lip sync done in {(time.time() - start_time) * 1000:.0f}ms")
+
+        if mode == "fast_refine" and on_refined is not None:
+            task = asyncio.create_task(self._refine_lipsync(wav, audio_base64, on_refined))
+            self._refine_tasks.add(task)
+            task.add_done_callback(self._refine_tasks.discard)
+        return lipsync_data
+
+    async def _refine_lipsync(
+        self, wav: bytes, audio_base64: str, on_refined: RefineCallback
+    ) -> None:
+        lipsync_data = await self.lipsync_from_wav(wav)
+        if not lipsync_data:
+            return
+        try:
+            await on_refined(audio_base64, lipsync_data)
+        except Exception as e:
+            logger.error(f"Exception storing refined lipsync: {str(e)}")
+
+    async def process_audio_stream(
+        self,
+        mp3_chunks: AsyncIterator[bytes],
+        text: str = "",
+        on_refined: Optional[RefineCallback] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        In-memory variant of process_audio_for_message: stream the MP3 into
+        ffmpeg as it downloads, run lipsync on the WAV buffer and base64
+        encode the MP3 buffer.
+
+        The download runs in its own task and keeps buffering while the
+        transcode waits for an ffmpeg slot.
+
+        Returns:
+            Tuple of (base64_audio, lipsync_data).
+        """
+        mp3_parts: List[bytes] = []
+        pending: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+        async def download() -> None:
+            try:
+                async for chunk in mp3_chunks:
+                    if chunk:
+                        mp3_parts.append(chunk)
+                        pending.put_nowait(chunk)
+            finally:
+                pending.put_nowait(None)
+
+        download_task = asyncio.create_task(download())
+        try:
+            wav = None
+            first_chunk = await pending.get()
+            if first_chunk is not None:
+                try:
+                    wav = await self.transcode_stream(first_chunk, pending)
+                except OverloadedError:
+                    # Degrade to audio without lipsync
+                    logger.warning("Skipping audio conversion, audio tools are overloaded")
+            # The full MP3 is returned either way; raises if the TTS stream failed
+            await download_task
+        finally:
+            if not download_task.done():
+                download_task.cancel()
+
+        mp3 = b"".join(mp3_parts)
+        audio_base64 = base64.b64encode(mp3).decode("utf-8")
+        lipsync_data = (
+            await self.lipsync_for_reply(wav, text, audio_base64, on_refined) if wav else {}
+        )
+        return audio_base64, lipsync_data
+
+    @staticmethod
+    def _read_bytes(file_path: str) -> bytes:
+        with open(file_path, "rb") as f:
+            return f.read()
+
     async def audio_file_to_base64(self, file_path: str) -> str:
         """
         Convert audio file to base64 string.
@@ -127,10 +431,13 @@ class AudioService:
         Returns:
             Base64-encoded string of the audio file.
         """
-        try:
+        def read() -> str:
             with open(file_path, "rb") as audio_file:
                 audio_data = audio_file.read()
                 return base64.b64encode(audio_data).decode("utf-8")
+
+        try:
+            return await asyncio.to_thread(read)
         except Exception as e:
             logger.error(f"Error reading audio file {file_path}: {str(e)}")
             return ""
@@ -145,12 +452,23 @@ class AudioService:
         Returns:
             JSON lipsync data.
         """
-        try:
+        def read() -> Dict[str, Any]:
             with open(file_path, "r") as json_file:
                 return json.load(json_file)
+
+        try:
+            return await asyncio.to_thread(read)
         except Exception as e:
             logger.error(f"Error reading JSON file {file_path}: {str(e)}")
             return {}
 
+    def close(self) -> None:
+        """
+        Remove the fd symlink directory (on shutdown)
+        """
+        if self._fd_link_dir is not None:
+            shutil.rmtree(self._fd_link_dir, ignore_errors=True)
+            self._fd_link_dir = None
+
 # Create a singleton instance
 audio_service = AudioService()
\ No newline at end of file
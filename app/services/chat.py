@@ -1,37 +1,211 @@
-import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 
 from app.config import settings
-# from app.models.chat import ChatResponse, Message
-from app.services.audio_service import audio_service
-
-
-
-# async def get_intro_messages() ->  :
-#     """
-#     Get pre-recorded intro messages.
-#     """
-#     messages = []
-    
-#     # Add first intro message
-#     audio_base64_1 = await audio_service.audio_file_to_base64(os.path.join(settings.AUDIO_DIR, "intro_0.wav"))
-#     lipsync_data_1 = await audio_service.read_json_transcript(os.path.join(settings.AUDIO_DIR, "intro_0.json"))
-#     messages.append(Message(
-#         text="Hey dear... How was your day?",
-#         audio=audio_base64_1,
-#         lipsync=lipsync_data_1,
-#         facialExpression="smile",
-#         animation="Talking_1"
-#     ))
-    
-#     # Add second intro message
-#     audio_base64_2 = await audio_service.audio_file_to_base64(os.path.join(settings.AUDIO_DIR, "intro_1.wav"))
-#     lipsync_data_2 = await audio_service.read_json_transcript(os.path.join(settings.AUDIO_DIR, "intro_1.json"))
-#     messages.append(Message(
-#         text="I missed you so much... Please don't go for so long!",
-#         audio=audio_base64_2,
-#         lipsync=lipsync_data_2,
-#         facialExpression="sad",
-#         animation="Crying"
-#     ))
-    
-#     return ChatResponse(messages=messages)
+from app.services.reply_audio import build_reply_message, render_reply_audio
+
+logger = logging.getLogger(__name__)
+
+
+INTRO_UTTERANCES = [
+    {
+        "text": "Hi, I'm TIA from the People Experience team.",
+        "facialExpression": "smile",
+        "animation": "Talking_1",
+    },
+    {
+        "text": "I'd love to hear how things have been going for you at work lately.",
+        "facialExpression": "smile",
+        "animation": "Talking_2",
+    },
+]
+
+FAREWELL_UTTERANCE = {
+    "text": "Thank you for chatting with me today! I hope our conversation was helpful.",
+    "facialExpression": "smile",
+    "animation": "Talking_0",
+}
+
+# Retry delays while the intro bundle cannot be fully rendered (e.g. TTS is down)
+INTRO_RETRY_INITIAL_SECONDS = 5
+INTRO_RETRY_MAX_SECONDS = 300
+
+
+class IntroBundle:
+    """
+    Intro and farewell utterances with audio and lipsync, rendered once at
+    startup and served from memory.
+
+    Rendering goes through the TTS cache, so after the first start it costs
+    a few cache reads. The audio is always inline: the bundle never needs disk
+    or subprocess work once loaded.
+    """
+
+    def __init__(self):
+        self._intro: Optional[List[Dict]] = None
+        self._farewell: Optional[Dict] = None
+
+    @staticmethod
+    async def _render(utterance: Dict[str, str]) -> Dict:
+        audio_base64, lipsync_data, audio_id = await render_reply_audio(
+            utterance["text"], delivery="inline"
+        )
+        return build_reply_message(
+            utterance["text"],
+            audio_base64,
+            lipsync_data,
+            audio_id,
+            facial_expression=utterance["facialExpression"],
+            animation=utterance["animation"],
+            delivery="inline",
+        )
+
+    async def _load_once(self) -> bool:
+        """
+        Render every utterance; True once all of them have audio
+        """
+        try:
+            intro = [await self._render(u) for u in INTRO_UTTERANCES]
+            farewell = await self._render(FAREWELL_UTTERANCE)
+        except Exception as e:
+            logger.error(f"Failed to render intro bundle: {str(e)}")
+            return False
+        # Serve what we have (text at least) while the rest is retried
+        self._intro, self._farewell = intro, farewell
+        return all(m["audio"] for m in intro + [farewell])
+
+    async def load(self) -> None:
+        """
+        Render every utterance, retrying with exponential backoff until all of
+        them have audio; rendered utterances come from the TTS cache on retries
+        """
+        delay = INTRO_RETRY_INITIAL_SECONDS
+        while not await self._load_once():
+            logger.warning(f"Intro bundle is missing audio, retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INTRO_RETRY_MAX_SECONDS)
+
+    def intro_messages(self) -> Optional[List[Dict]]:
+        """
+        Intro messages, or None while the bundle is still rendering
+        """
+        return list(self._intro) if self._intro is not None else None
+
+    def farewell_message(self) -> Optional[Dict]:
+        return self._farewell
+
+
+intro_bundle = IntroBundle()
+
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _encoding = None
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with tiktoken when available, otherwise estimate ~4 chars/token
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class ConversationHistory:
+    # Chat messages to send verbatim, oldest first (summary message included)
+    messages: List[Dict[str, str]]
+    # Messages that fell out of the window and are not in the summary yet
+    to_summarize: List[Dict[str, str]]
+    # Total number of messages covered by the summary once to_summarize is folded in
+    summarized_count: int
+
+
+class ChatHistoryBuilder:
+    """
+    Build the conversation history for a chat turn within a token budget.
+
+    The most recent turns are kept verbatim as long as they fit in
+    HISTORY_TOKEN_BUDGET and HISTORY_MAX_TURNS; everything older is
+    represented by the rolling summary stored on ChatSession.summary.
+    """
+
+    def __init__(self, token_budget: int, max_turns: int):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+
+    @staticmethod
+    def to_chat_messages(rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Convert stored message rows ({"question", "answer"}) into chat messages
+        """
+        messages = []
+        for row in rows:
+            if row.get("question"):
+                messages.append({"role": "user", "content": row["question"]})
+            if row.get("answer"):
+                messages.append({"role": "assistant", "content": row["answer"]})
+        return messages
+
+    def build(
+        self,
+        rows: List[Dict[str, str]],
+        summary: Optional[str],
+        summarized_count: int,
+    ) -> ConversationHistory:
+        messages = self.to_chat_messages(rows)
+
+        # Walk back from the newest message, keeping whole turns (a turn
+        # starts at a user message) while they fit the budget
+        budget = self.token_budget
+        if summary:
+            budget -= count_tokens(summary) + MESSAGE_TOKEN_OVERHEAD
+        keep_from = len(messages)
+        turns = 0
+        turn_tokens = 0
+        for index in range(len(messages) - 1, -1, -1):
+            turn_tokens += count_tokens(messages[index]["content"]) + MESSAGE_TOKEN_OVERHEAD
+            if messages[index]["role"] != "user" and index > 0:
+                continue
+            if turns >= self.max_turns or turn_tokens > budget:
+                break
+            budget -= turn_tokens
+            turn_tokens = 0
+            turns += 1
+            keep_from = index
+
+        # Messages already folded into the summary are never resent
+        keep_from = max(keep_from, min(summarized_count, len(messages)))
+
+        history = []
+        if summary:
+            history.append(
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation: {summary}",
+                }
+            )
+        history.extend(messages[keep_from:])
+
+        return ConversationHistory(
+            messages=history,
+            to_summarize=messages[summarized_count:keep_from],
+            summarized_count=keep_from,
+        )
+
+
+chat_history_builder = ChatHistoryBuilder(
+    token_budget=settings.HISTORY_TOKEN_BUDGET,
+    max_turns=settings.HISTORY_MAX_TURNS,
+)
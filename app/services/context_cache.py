@@ -0,0 +1,59 @@
+# app/services/context_cache.py
+import logging
+from typing import Any, Dict, Iterable
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.services.analytics import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeContextCache:
+    """
+    Per chat session cache of the employee data used to build the chatbot prompt.
+
+    The data is computed once when the session is created and reused for every
+    turn. Entries expire after a TTL and are dropped early when an upload
+    touches the employee.
+    """
+
+    def __init__(self):
+        # session_id -> (employee_id, employee_data)
+        self._cache = TTLCache(
+            max_size=settings.EMPLOYEE_CONTEXT_CACHE_SIZE,
+            ttl_seconds=settings.EMPLOYEE_CONTEXT_TTL_SECONDS,
+        )
+
+    def prime(self, db: Session, session_id: str, employee_id: str) -> Dict[str, Any]:
+        """
+        Compute and cache the employee data for a session
+        """
+        employee_data = AnalyticsService.get_employee_data(db, employee_id)
+        self._cache.set(session_id, (employee_id, employee_data))
+        return employee_data
+
+    def get(self, db: Session, session_id: str, employee_id: str) -> Dict[str, Any]:
+        """
+        Return the cached employee data for a session, computing it on a miss
+        """
+        cached = self._cache.get(session_id)
+        if cached is not None and cached[0] == employee_id:
+            return cached[1]
+        return self.prime(db, session_id, employee_id)
+
+    def invalidate_employees(self, employee_ids: Iterable[str]) -> int:
+        """
+        Drop cached context for every session of the given employees
+        """
+        ids = {str(employee_id) for employee_id in employee_ids}
+        removed = self._cache.invalidate_where(lambda _, value: value[0] in ids)
+        if removed:
+            logger.info(f"Invalidated {removed} cached chat contexts")
+        return removed
+
+
+# Create a singleton instance
+employee_context_cache = EmployeeContextCache()
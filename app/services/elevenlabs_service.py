@@ -1,30 +1,62 @@
 import os
-from typing import List, Dict, Any, Union, Iterator
-from elevenlabs import generate, voices
-from elevenlabs.api import User
+import asyncio
+import logging
+from typing import List, Dict, Any, AsyncIterator
+import httpx
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 class ElevenLabsService:
     def __init__(self):
-        # Set API key from settings
-        os.environ["ELEVEN_API_KEY"] = settings.ELEVEN_LABS_API_KEY
         self.voice_id = settings.VOICE_ID
+        self.model = "eleven_monolingual_v1"
         self.audio_dir = settings.AUDIO_DIR
         # Create audio directory if it doesn't exist
         if not os.path.exists(self.audio_dir):
             os.makedirs(self.audio_dir)
-    
+
+        # One keep-alive connection pool shared by every request
+        self.client = httpx.AsyncClient(
+            base_url=settings.ELEVEN_LABS_BASE_URL,
+            headers={"xi-api-key": settings.ELEVEN_LABS_API_KEY},
+            timeout=httpx.Timeout(
+                settings.ELEVEN_LABS_TIMEOUT_SECONDS,
+                connect=settings.ELEVEN_LABS_CONNECT_TIMEOUT_SECONDS,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.ELEVEN_LABS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ELEVEN_LABS_MAX_CONNECTIONS,
+            ),
+        )
+
     async def get_voices(self) -> List[Dict[str, Any]]:
         """Get all available voices from ElevenLabs."""
         try:
             if not settings.ELEVEN_LABS_API_KEY:
                 return []
-            voice_list = voices()
-            return [voice.to_dict() for voice in voice_list]
+            response = await self.client.get("/v1/voices")
+            response.raise_for_status()
+            return response.json().get("voices", [])
         except Exception as e:
-            print(f"Error getting voices: {str(e)}")
+            logger.error(f"Error getting voices: {str(e)}")
             return []
-    
+
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Stream MP3 audio for text from the ElevenLabs streaming endpoint.
+        Raises httpx errors on failure.
+        """
+        async with self.client.stream(
+            "POST",
+            f"/v1/text-to-speech/{self.voice_id}/stream",
+            json={"text": text, "model_id": self.model},
+            headers={"Accept": "audio/mpeg"},
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
     async def text_to_speech(self, text: str, filename: str) -> bool:
         """
         Convert text to speech using ElevenLabs API.
@@ -34,36 +66,26 @@ class ElevenLabsService:
         Returns:
             True if successful, False otherwise.
         """
+        if not settings.ELEVEN_LABS_API_KEY:
+            return False
+
+        full_path = os.path.join(self.audio_dir, filename)
         try:
-            if not settings.ELEVEN_LABS_API_KEY:
-                return False
-            
-            # Generate audio
-            audio = generate(
-                text=text,
-                voice=self.voice_id,
-                model="eleven_monolingual_v1"
-            )
-            
-            # Save to file directly using open instead of elevenlabs.save
-            full_path = os.path.join(self.audio_dir, filename)
-            
-            # Convert to bytes if it's an iterator
-            if isinstance(audio, bytes):
-                audio_bytes = audio
-            elif isinstance(audio, bytearray):
-                audio_bytes = bytes(audio)
-            else:  # Iterator
-                audio_bytes = b''.join(list(audio))
-                
-            # Save using standard file operations
-            with open(full_path, 'wb') as f:
-                f.write(audio_bytes)
-                
+            # Write chunks as they arrive instead of buffering the whole clip;
+            # file I/O runs on a worker thread, not the event loop
+            f = await asyncio.to_thread(open, full_path, 'wb')
+            try:
+                async for chunk in self.stream_speech(text):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
             return True
         except Exception as e:
-            print(f"Error generating speech: {str(e)}")
+            logger.error(f"Error generating speech: {str(e)}")
             return False
 
+    async def close(self) -> None:
+        await self.client.aclose()
+
 # Create a singleton instance
-elevenlabs_service = ElevenLabsService()
\ No newline at end of file
+elevenlabs_service = ElevenLabsService()
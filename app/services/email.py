@@ -1,14 +1,67 @@
 # app/services/email.py
-import smtplib
+import asyncio
+from string import Template
+from typing import Awaitable, Callable, List, Optional, Set
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.employee import Employee
+from app.services.smtp_pool import smtp_pool
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Emails sent off the request path; referenced so they are not collected
+_background_sends: Set[asyncio.Task] = set()
+
+
+# Employee alert, parsed once and filled in per recipient
+EMPLOYEE_ALERT_SUBJECT = "Vibemeter Alert: Immediate Attention Required"
+EMPLOYEE_ALERT_HTML = Template("""
+                <html>
+                <head>
+                    <style>
+                        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+                        .header { background-color: #86BC25; color: white; padding: 10px 20px; }
+                        .content { padding: 20px; border: 1px solid #ddd; }
+                        .footer { font-size: 12px; color: #999; margin-top: 20px; }
+                    </style>
+                </head>
+                <body>
+                    <div class="container">
+                        <div class="header">
+                            <h2>Deloitte Employee Alert</h2>
+                        </div>
+                        <div class="content">
+                            <p>Hello $name,</p>
+                            <p>We have detected a potential issue with your recent activity on the Vibemeter system.</p>
+                            <p>We recommend that you take a moment to contact the wellness bot for your well-being check.</p>
+
+                            <p>This is an automated message from the Vibemeter system. If you have any questions, please reply to this email or contact HR.</p>
+                            <p>Best regards,<br>Deloitte People Experience Team</p>
+                        </div>
+                        <div class="footer">
+                            <p>This email is confidential and intended solely for the person or entity to whom it is addressed.</p>
+                        </div>
+                    </div>
+                </body>
+                </html>
+                """)
+EMPLOYEE_ALERT_TEXT = Template("""
+        Hello $name,
+
+        We have detected a potential issue with your recent activity on the Vibemeter system. We recommend that you take a moment to contact the wellness bot for your well-being check.
+
+        This is an automated message from the Vibemeter system. If you have any questions, please reply to this email or contact HR.
+
+        Best regards,
+        Deloitte People Experience Team
+
+        This email is confidential and intended solely for the person or entity to whom it is addressed.
+                """)
+
 
 class EmailService:
     @staticmethod
@@ -16,7 +69,7 @@ class EmailService:
         to_email: str, subject: str, text_content: str, html_content: str = ""
     ) -> bool:
         """
-        Send an email using SMTP
+        Send an email over a pooled SMTP connection
         """
         try:
             # Create message
@@ -32,12 +85,7 @@ class EmailService:
             if html_content:
                 message.attach(MIMEText(html_content, "html"))
 
-            # Connect to SMTP server
-            with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-                server.starttls()
-                if settings.SMTP_USERNAME and settings.SMTP_PASSWORD:
-                    server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                server.send_message(message)
+            await smtp_pool.send(message)
 
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -46,6 +94,24 @@ class EmailService:
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
 
+    @staticmethod
+    def send_in_background(send: Awaitable[bool]) -> asyncio.Task:
+        """
+        Send without waiting for the result (failures are logged by send_email)
+        """
+        task = asyncio.ensure_future(send)
+        _background_sends.add(task)
+        task.add_done_callback(_background_sends.discard)
+        return task
+
+    @staticmethod
+    async def drain_background_sends(timeout: float = 30) -> None:
+        """
+        Wait for emails still being sent (on shutdown)
+        """
+        if _background_sends:
+            await asyncio.wait(set(_background_sends), timeout=timeout)
+
     @staticmethod
     async def send_employee_alert(db: Session, employee_id: str) -> bool:
         """
@@ -56,56 +122,42 @@ class EmailService:
             logger.error(f"Employee with ID {employee_id} not found")
             return False
 
-        html_content = f"""
-                <html>
-                <head>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                        .header {{ background-color: #86BC25; color: white; padding: 10px 20px; }}
-                        .content {{ padding: 20px; border: 1px solid #ddd; }}
-                        .footer {{ font-size: 12px; color: #999; margin-top: 20px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="header">
-                            <h2>Deloitte Employee Alert</h2>
-                        </div>
-                        <div class="content">
-                            <p>Hello {employee.name},</p>
-                            <p>We have detected a potential issue with your recent activity on the Vibemeter system.</p>
-                            <p>We recommend that you take a moment to contact the wellness bot for your well-being check.</p>
-
-                            <p>This is an automated message from the Vibemeter system. If you have any questions, please reply to this email or contact HR.</p>
-                            <p>Best regards,<br>Deloitte People Experience Team</p>
-                        </div>
-                        <div class="footer">
-                            <p>This email is confidential and intended solely for the person or entity to whom it is addressed.</p>
-                        </div>
-                    </div>
-                </body>
-                </html>
-                """
-
-        text_content = f"""
-        Hello {employee.name},
-
-        We have detected a potential issue with your recent activity on the Vibemeter system. We recommend that you take a moment to contact the wellness bot for your well-being check.
+        return await EmailService.send_alert_to(employee)
 
-        This is an automated message from the Vibemeter system. If you have any questions, please reply to this email or contact HR.
+    @staticmethod
+    async def send_alert_to(employee: Employee) -> bool:
+        """
+        Send an alert to an already loaded employee
+        """
+        return await EmailService.send_email(
+            to_email=str(employee.email),
+            subject=EMPLOYEE_ALERT_SUBJECT,
+            text_content=EMPLOYEE_ALERT_TEXT.substitute(name=employee.name),
+            html_content=EMPLOYEE_ALERT_HTML.substitute(name=employee.name),
+        )
 
-        Best regards,
-        Deloitte People Experience Team
+    @staticmethod
+    async def send_bulk_alerts(
+        employees: List[Employee],
+        on_result: Optional[Callable[[int, bool], None]] = None,
+    ) -> List[bool]:
+        """
+        Send the alert to many employees over the pooled SMTP connections,
+        one send in flight per connection (SMTP_POOL_SIZE). on_result(index,
+        ok) is called as each send finishes; returns whether each send
+        succeeded, in order
+        """
+        semaphore = asyncio.Semaphore(smtp_pool.size)
 
-        This email is confidential and intended solely for the person or entity to whom it is addressed.
-                """
+        async def send(index: int, employee: Employee) -> bool:
+            async with semaphore:
+                ok = await EmailService.send_alert_to(employee)
+            if on_result is not None:
+                on_result(index, ok)
+            return ok
 
-        return await EmailService.send_email(
-            to_email=str(employee.email),
-            subject="Vibemeter Alert: Immediate Attention Required",
-            text_content=text_content,
-            html_content=html_content,
+        return await asyncio.gather(
+            *(send(index, employee) for index, employee in enumerate(employees))
         )
 
     @staticmethod
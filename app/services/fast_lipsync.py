@@ -0,0 +1,170 @@
+# app/services/fast_lipsync.py
+import io
+import math
+import re
+import sys
+import wave
+from array import array
+from typing import Any, Dict, List, Tuple
+
+# Rhubarb mouth shapes:
+#   A closed (M, B, P)          B slightly open, teeth (most consonants, EE)
+#   C open (EH, AE)             D wide open (AA)
+#   E slightly rounded (AO, ER) F puckered (UW, OW, W)
+#   G teeth on lip (F, V)       H tongue raised (L)
+#   X idle / silence
+DIGRAPH_SHAPES = {
+    "th": "B", "sh": "B", "ch": "B", "ng": "B", "ph": "G",
+    "ee": "B", "ea": "B", "oo": "F", "ou": "F", "ow": "F", "oa": "F",
+    "ai": "C", "ay": "C", "er": "E", "ir": "E", "ur": "E", "or": "E", "aw": "E",
+}
+LETTER_SHAPES = {
+    "a": "D", "e": "C", "i": "B", "o": "E", "u": "F", "y": "B",
+    "m": "A", "b": "A", "p": "A",
+    "f": "G", "v": "G",
+    "l": "H",
+    "w": "F", "q": "F",
+}
+OPEN_SHAPES = {"C", "D"}
+
+FRAME_SECONDS = 0.01
+MIN_CUE_SECONDS = 0.05
+MIN_PAUSE_SECONDS = 0.12
+
+
+def text_to_shapes(text: str) -> List[str]:
+    """
+    Approximate the mouth shapes of a text from its spelling; word breaks
+    become "X" (mouth at rest)
+    """
+    shapes: List[str] = []
+    for word in re.findall(r"[a-z']+", text.lower()):
+        word = word.replace("'", "")
+        i = 0
+        while i < len(word):
+            pair = word[i:i + 2]
+            if pair in DIGRAPH_SHAPES:
+                shape = DIGRAPH_SHAPES[pair]
+                i += 2
+            else:
+                shape = LETTER_SHAPES.get(word[i], "B")
+                i += 1
+            if not shapes or shapes[-1] != shape:
+                shapes.append(shape)
+        shapes.append("X")
+    return shapes[:-1]
+
+
+def wav_envelope(wav: bytes) -> Tuple[List[float], float]:
+    """
+    RMS energy per FRAME_SECONDS frame of a PCM WAV, normalized to 0..1,
+    and the duration in seconds
+    """
+    with wave.open(io.BytesIO(wav), "rb") as reader:
+        channels = reader.getnchannels()
+        sample_width = reader.getsampwidth()
+        rate = reader.getframerate()
+        frames = reader.readframes(reader.getnframes())
+
+    if sample_width != 2:
+        raise ValueError(f"Unsupported sample width {sample_width}")
+    samples = array("h")
+    samples.frombytes(frames[: len(frames) - len(frames) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+
+    duration = len(samples) / channels / rate
+    step = max(1, int(rate * FRAME_SECONDS)) * channels
+    envelope = []
+    for start in range(0, len(samples), step):
+        window = samples[start:start + step]
+        envelope.append(math.sqrt(sum(s * s for s in window) / len(window)))
+
+    peak = max(envelope, default=0) or 1
+    return [value / peak for value in envelope], duration
+
+
+def voiced_segments(envelope: List[float], threshold: float = 0.08) -> List[Tuple[int, int]]:
+    """
+    Frame ranges [start, end) of speech, ignoring pauses shorter than
+    MIN_PAUSE_SECONDS
+    """
+    min_pause = int(MIN_PAUSE_SECONDS / FRAME_SECONDS)
+    segments: List[Tuple[int, int]] = []
+    start = None
+    for index, value in enumerate(envelope + [0.0]):
+        if value >= threshold and start is None:
+            start = index
+        elif value < threshold and start is not None:
+            if segments and start - segments[-1][1] < min_pause:
+                segments[-1] = (segments[-1][0], index)
+            else:
+                segments.append((start, index))
+            start = None
+    return segments
+
+
+def generate(text: str, wav: bytes, sound_file: str = "") -> Dict[str, Any]:
+    """
+    Build Rhubarb-compatible lipsync JSON from the reply text and its audio.
+
+    The shapes come from the text; their timing comes from the audio: they
+    are spread over the voiced parts of the envelope, pauses become "X" and
+    open vowels are narrowed to "B" where the audio is quiet.
+    """
+    envelope, duration = wav_envelope(wav)
+    shapes = [shape for shape in text_to_shapes(text) if shape != "X"] or ["B"]
+    segments = voiced_segments(envelope)
+
+    cues: List[List[Any]] = []  # [start, end, value]
+
+    def add(start: float, end: float, value: str) -> None:
+        if end <= start:
+            return
+        if cues and cues[-1][2] == value:
+            cues[-1][1] = end
+        elif cues and end - start < MIN_CUE_SECONDS and cues[-1][2] != "X":
+            # Too short to show: fold into the previous shape, never into a pause
+            cues[-1][1] = end
+        else:
+            cues.append([start, end, value])
+
+    voiced_frames = sum(end - start for start, end in segments) or 1
+    position = 0
+    cursor = 0.0
+    for seg_start, seg_end in segments:
+        add(cursor, seg_start * FRAME_SECONDS, "X")
+        # Shapes assigned to this segment, proportional to its length
+        first = position * len(shapes) // voiced_frames
+        position += seg_end - seg_start
+        last = max(first + 1, position * len(shapes) // voiced_frames)
+        segment_shapes = shapes[first:last] or shapes[-1:]
+        # Keep every shape at least MIN_CUE_SECONDS long by sampling them evenly
+        max_shapes = max(1, int((seg_end - seg_start) * FRAME_SECONDS / MIN_CUE_SECONDS))
+        if len(segment_shapes) > max_shapes:
+            segment_shapes = [
+                segment_shapes[index * len(segment_shapes) // max_shapes]
+                for index in range(max_shapes)
+            ]
+
+        frames_per_shape = (seg_end - seg_start) / len(segment_shapes)
+        for index, shape in enumerate(segment_shapes):
+            start_frame = seg_start + index * frames_per_shape
+            end_frame = start_frame + frames_per_shape
+            window = envelope[int(start_frame):max(int(start_frame) + 1, int(end_frame))]
+            if shape in OPEN_SHAPES and max(window, default=0) < 0.3:
+                shape = "B"
+            add(start_frame * FRAME_SECONDS, end_frame * FRAME_SECONDS, shape)
+        cursor = seg_end * FRAME_SECONDS
+    add(cursor, duration, "X")
+    if not cues:
+        cues.append([0.0, duration, "X"])
+
+    return {
+        "metadata": {"soundFile": sound_file, "duration": round(duration, 2)},
+        "mouthCues": [
+            {"start": round(start, 2), "end": round(end, 2), "value": value}
+            for start, end, value in cues
+            if round(end, 2) > round(start, 2)
+        ],
+    }
@@ -0,0 +1,118 @@
+# app/services/reply_audio.py
+import asyncio
+import base64
+import logging
+import os
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.audio_service import audio_service
+from app.services.elevenlabs_service import elevenlabs_service
+from app.services.tts_cache import tts_cache
+from app.utils.helper import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+def message_audio_path(audio_id: str) -> str:
+    return os.path.join(settings.AUDIO_DIR, f"message_{audio_id}.mp3")
+
+
+def _write_message_audio(audio_id: str, mp3: bytes) -> None:
+    with open(message_audio_path(audio_id), "wb") as f:
+        f.write(mp3)
+
+
+async def render_reply_audio(
+    text: str, timer: Optional[StageTimer] = None, delivery: Optional[str] = None
+) -> Tuple[str, Dict[str, Any], Optional[str]]:
+    """
+    TTS, audio conversion and lipsync for a bot utterance; repeated utterances
+    are served from the TTS cache.
+
+    Returns (base64_audio, lipsync_data, audio_id). With url delivery
+    (AUDIO_DELIVERY or an explicit delivery mode), audio_id is a random
+    per-turn id under which GET /chatbot/audio/{audio_id} serves the MP3;
+    it is never the TTS cache key, which anyone could compute from the text.
+    """
+    timer = timer or StageTimer()
+    cache_key = tts_cache.make_key(text, elevenlabs_service.voice_id, elevenlabs_service.model)
+    with timer.stage("tts_cache"):
+        cached = await tts_cache.get(cache_key)
+
+    # Id under which GET /audio/{audio_id} serves the MP3 (url delivery)
+    audio_id = None
+
+    async def on_refined(audio: str, lipsync: Dict[str, Any]) -> None:
+        # LIPSYNC_MODE=fast_refine: later hits get the Rhubarb cues
+        await tts_cache.put(cache_key, audio, lipsync)
+
+    if cached:
+        audio_base64, lipsync_data = cached["audio"], cached["lipsync"]
+    elif settings.AUDIO_PIPELINE_MODE == "memory":
+        # TTS streams straight into ffmpeg, so "audio" covers both stages
+        audio_base64, lipsync_data = "", {}
+        if settings.ELEVEN_LABS_API_KEY:
+            with timer.stage("audio"):
+                try:
+                    audio_base64, lipsync_data = await audio_service.process_audio_stream(
+                        elevenlabs_service.stream_speech(text), text, on_refined
+                    )
+                except Exception as e:
+                    logger.error(f"Error synthesizing reply audio: {str(e)}")
+        await tts_cache.put(cache_key, audio_base64, lipsync_data)
+    else:
+        # Unique per turn so concurrent turns never overwrite each other's files
+        artifact_id = uuid.uuid4().hex
+        mp3_filename = f"message_{artifact_id}.mp3"
+        with timer.stage("tts"):
+            await elevenlabs_service.text_to_speech(text, mp3_filename)
+
+        # Process audio (convert to WAV, generate lipsync)
+        with timer.stage("audio"):
+            audio_base64, lipsync_data = await audio_service.process_audio_for_message(
+                artifact_id, text, on_refined
+            )
+
+        await tts_cache.put(cache_key, audio_base64, lipsync_data)
+        audio_id = artifact_id if audio_base64 else None
+
+    if audio_id is None and audio_base64 and (delivery or settings.AUDIO_DELIVERY) == "url":
+        # Per-turn copy, kept for AUDIO_RETENTION_SECONDS by the janitor, so
+        # the URL outlives a TTS cache eviction
+        audio_id = uuid.uuid4().hex
+        await asyncio.to_thread(
+            _write_message_audio, audio_id, base64.b64decode(audio_base64)
+        )
+
+    return audio_base64, lipsync_data, audio_id
+
+
+def build_reply_message(
+    text: str,
+    audio_base64: str,
+    lipsync_data: Dict[str, Any],
+    audio_id: Optional[str],
+    facial_expression: str,
+    animation: str,
+    delivery: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Shape a bot utterance for the client according to AUDIO_DELIVERY
+    (or an explicit delivery mode)
+    """
+    message = {
+        "text": text,
+        "audio": audio_base64,
+        "lipsync": lipsync_data,
+        "facialExpression": facial_expression,
+        "animation": animation
+    }
+    if (delivery or settings.AUDIO_DELIVERY) == "url":
+        # Lipsync stays inline; the client fetches (and can stream) the MP3
+        message["audio"] = None
+        message["audioUrl"] = (
+            f"{settings.API_V1_STR}/chatbot/audio/{audio_id}" if audio_id else None
+        )
+    return message
@@ -0,0 +1,156 @@
+# app/services/smtp_pool.py
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection is dropped and the send retried on a new one
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, OSError)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if isinstance(error, RECONNECT_ERRORS):
+        return True
+    # 421: the server is closing the connection (idle timeout, shutdown)
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code == 421
+
+
+class SMTPConnectionPool:
+    """
+    Persistent, authenticated SMTP connections, one per worker thread.
+
+    smtplib is blocking, so sends run on a small dedicated thread pool
+    instead of the event loop. Each thread keeps its own connection open
+    between messages (TLS handshake and login happen once), checks it with
+    NOOP after idle_check_seconds of inactivity, and reconnects and retries
+    once if the server dropped it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int,
+        timeout_seconds: float,
+        idle_check_seconds: float,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout_seconds = timeout_seconds
+        self.idle_check_seconds = idle_check_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.sent = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout_seconds)
+        server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        with self._lock:
+            self._connections.append(server)
+            self.connects += 1
+        logger.info(f"Opened SMTP connection to {self.host}:{self.port}")
+        return server
+
+    def _discard(self, server: Optional[smtplib.SMTP]) -> None:
+        self._local.server = None
+        if server is None:
+            return
+        with self._lock:
+            if server in self._connections:
+                self._connections.remove(server)
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def _connection(self) -> smtplib.SMTP:
+        """
+        This thread's connection, reconnecting if it was idle and no longer answers
+        """
+        server = getattr(self._local, "server", None)
+        if server is not None:
+            idle = time.monotonic() - self._local.last_used
+            if idle >= self.idle_check_seconds:
+                try:
+                    healthy = server.noop()[0] == 250
+                except (smtplib.SMTPException, OSError):
+                    healthy = False
+                if not healthy:
+                    self._discard(server)
+                    server = None
+        if server is None:
+            server = self._connect()
+            self._local.server = server
+        self._local.last_used = time.monotonic()
+        return server
+
+    def _send(self, message: Message) -> None:
+        for attempt in range(2):
+            server = self._connection()
+            try:
+                server.send_message(message)
+                break
+            except Exception as e:
+                if not _is_connection_error(e):
+                    raise
+                self._discard(server)
+                if attempt:
+                    raise
+        with self._lock:
+            self.sent += 1
+
+    async def send(self, message: Message) -> None:
+        """
+        Send a message over a pooled connection; raises on failure
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.size, thread_name_prefix="smtp"
+            )
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._send, message
+        )
+
+    def _close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for server in connections:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_SERVER,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    size=settings.SMTP_POOL_SIZE,
+    timeout_seconds=settings.SMTP_TIMEOUT_SECONDS,
+    idle_check_seconds=settings.SMTP_IDLE_CHECK_SECONDS,
+)
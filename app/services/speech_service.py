@@ -1,7 +1,14 @@
 import os
+import asyncio
 import logging
-from openai import OpenAI
+import uuid
+import wave
+from typing import Optional
+import aiohttp
+from openai import AsyncOpenAI
 from app.config import settings
+from app.core.resilience import ConcurrencyLimiter, OverloadedError
+from app.services.whisper_engine import whisper_engine
 
 logger = logging.getLogger(__name__)
 
@@ -10,15 +17,47 @@ class SpeechService:
         """Initialize the Speech Service."""
         self.client = None
         if settings.OPENAI_API_KEY and settings.OPENAI_API_KEY != "-":
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            self.client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=settings.STT_TIMEOUT_SECONDS,
+            )
+        # Created on first use: aiohttp sessions must be created inside the event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+
+        # Separate limits so a slow backend cannot starve the other
+        self.openai_limiter = ConcurrencyLimiter(
+            settings.STT_MAX_CONCURRENCY, settings.STT_MAX_QUEUE
+        )
+        self.self_hosted_limiter = ConcurrencyLimiter(
+            settings.STT_MAX_CONCURRENCY, settings.STT_MAX_QUEUE
+        )
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared keep-alive session for the self hosted Whisper service."""
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(
+                        limit=settings.STT_MAX_CONCURRENCY,
+                        keepalive_timeout=60,
+                    ),
+                    timeout=aiohttp.ClientTimeout(total=settings.STT_TIMEOUT_SECONDS),
+                )
+            return self._session
+
+    @staticmethod
+    def _read_bytes(file_path: str) -> bytes:
+        with open(file_path, "rb") as f:
+            return f.read()
 
     async def transcribe_audio_openai_whisper(self, audio_file_path: str) -> str:
         """
         Transcribe audio file to text using OpenAI's Whisper model.
-        
+
         Args:
             audio_file_path: Path to the audio file
-            
+
         Returns:
             Transcribed text
         """
@@ -26,16 +65,20 @@ class SpeechService:
             if not self.client:
                 logger.error("OpenAI client not initialized - API key may be missing")
                 return ""
-                
+
             logger.info(f"Transcribing audio file: {audio_file_path}")
-            
-            with open(audio_file_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
+            audio = await asyncio.to_thread(self._read_bytes, audio_file_path)
+
+            async with self.openai_limiter.slot(timeout=settings.STT_QUEUE_TIMEOUT_SECONDS):
+                transcript = await self.client.audio.transcriptions.create(
                     model="whisper-1",
-                    file=audio_file
+                    file=(os.path.basename(audio_file_path), audio)
                 )
             return transcript.text
-            
+
+        except OverloadedError as e:
+            logger.warning(f"Skipping transcription, speech-to-text is overloaded: {str(e)}")
+            return ""
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
             return ""
@@ -43,31 +86,27 @@ class SpeechService:
     async def transcribe_audio_self_hosted(self, audio_file_path: str) -> str:
         """
         Transcribe audio file to text using a self hosted Whisper model.
-        
+
         Args:
             audio_file_path: Path to the audio file
-        
+
         Returns:
             Transcribed text
         """
-        import aiohttp
-        
         try:
             logger.info(f"Transcribing audio file with local Whisper model: {audio_file_path}")
-            
+
             # Local Whisper API endpoint
             local_whisper_url = settings.SELF_HOSTED_WHISPER_URL+"/api/v1/transcribe"
-            
-            # Read the audio file as binary data
-            with open(audio_file_path, "rb") as audio_file:
-                file_data = audio_file.read()
-            
-            # Prepare the file for sending
-            files = {'file': (os.path.basename(audio_file_path), file_data)}
-            
-            # Make the API request to the local Whisper service
-            async with aiohttp.ClientSession() as session:
-                async with session.post(local_whisper_url, data=files) as response:
+            session = await self._get_session()
+            audio = await asyncio.to_thread(self._read_bytes, audio_file_path)
+
+            async with self.self_hosted_limiter.slot(timeout=settings.STT_QUEUE_TIMEOUT_SECONDS):
+                form = aiohttp.FormData()
+                form.add_field("file", audio, filename=os.path.basename(audio_file_path))
+
+                # Make the API request to the local Whisper service
+                async with session.post(local_whisper_url, data=form) as response:
                     if response.status == 200:
                         result = await response.json()
                         logger.info(f"Local transcription successful. Language: {result.get('language')}, Duration: {result.get('duration')}s")
@@ -76,10 +115,90 @@ class SpeechService:
                         error_text = await response.text()
                         logger.error(f"Local Whisper API returned status {response.status}: {error_text}")
                         return ""
-        
+
+        except OverloadedError as e:
+            logger.warning(f"Skipping transcription, speech-to-text is overloaded: {str(e)}")
+            return ""
         except Exception as e:
             logger.error(f"Error transcribing audio with local Whisper model: {str(e)}")
             return ""
 
+    async def transcribe_audio_local(self, audio_file_path: str) -> str:
+        """
+        Transcribe audio file to text with the in-process Whisper engine.
+
+        Args:
+            audio_file_path: Path to the audio file
+
+        Returns:
+            Transcribed text
+        """
+        try:
+            logger.info(f"Transcribing audio file with the local Whisper engine: {audio_file_path}")
+            result = await asyncio.wait_for(
+                whisper_engine.transcribe(audio_file_path), settings.STT_TIMEOUT_SECONDS
+            )
+            return result.get("text", "")
+        except OverloadedError as e:
+            logger.warning(f"Skipping transcription, speech-to-text is overloaded: {str(e)}")
+            return ""
+        except Exception as e:
+            logger.error(f"Error transcribing audio with the local Whisper engine: {str(e)}")
+            return ""
+
+    async def transcribe(self, audio_file_path: str) -> str:
+        """Transcribe with the backend selected by settings.STT_BACKEND."""
+        if settings.STT_BACKEND == "local":
+            return await self.transcribe_audio_local(audio_file_path)
+        if settings.STT_BACKEND == "self_hosted":
+            return await self.transcribe_audio_self_hosted(audio_file_path)
+        return await self.transcribe_audio_openai_whisper(audio_file_path)
+
+    async def transcribe_pcm(self, pcm: bytes, sample_rate: int = 16000) -> str:
+        """
+        Transcribe raw 16-bit mono PCM with the backend selected by settings.STT_BACKEND.
+
+        The local engine takes the samples directly; the HTTP backends get a
+        temporary WAV file in INCOMING_AUDIO_DIR.
+        """
+        if settings.STT_BACKEND == "local" and sample_rate == 16000:
+            try:
+                result = await asyncio.wait_for(
+                    whisper_engine.transcribe(pcm), settings.STT_TIMEOUT_SECONDS
+                )
+                return result.get("text", "")
+            except OverloadedError as e:
+                logger.warning(f"Skipping transcription, speech-to-text is overloaded: {str(e)}")
+                return ""
+            except Exception as e:
+                logger.error(f"Error transcribing audio with the local Whisper engine: {str(e)}")
+                return ""
+
+        path = os.path.join(settings.INCOMING_AUDIO_DIR, f"voice_{uuid.uuid4().hex}.wav")
+
+        def write_wav() -> None:
+            os.makedirs(settings.INCOMING_AUDIO_DIR, exist_ok=True)
+            with wave.open(path, "wb") as writer:
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(sample_rate)
+                writer.writeframes(pcm)
+
+        await asyncio.to_thread(write_wav)
+        try:
+            return await self.transcribe(path)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self.client is not None:
+            await self.client.close()
+        await whisper_engine.close()
+
 # Create a singleton instance
-speech_service = SpeechService()
\ No newline at end of file
+speech_service = SpeechService()
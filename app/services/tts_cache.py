@@ -0,0 +1,145 @@
+# app/services/tts_cache.py
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Disk-backed, content-addressed cache of synthesized replies.
+
+    Entries are keyed by hash(text, voice_id, model). Each entry is the MP3
+    ({key}.mp3) and a payload file ({key}.json) holding the base64 audio and
+    the lipsync data, so a hit needs no TTS call, no ffmpeg and no Rhubarb.
+    The total size is bounded; least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> entry size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model: str) -> str:
+        return hashlib.sha256(
+            json.dumps([text, voice_id, model], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def _paths(self, key: str):
+        return (
+            os.path.join(self.cache_dir, f"{key}.mp3"),
+            os.path.join(self.cache_dir, f"{key}.json"),
+        )
+
+    def _load_index(self) -> None:
+        # Rebuild the LRU order from the payload mtimes left by earlier runs
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            mp3_path, json_path = self._paths(key)
+            try:
+                size = os.path.getsize(json_path) + os.path.getsize(mp3_path)
+                entries.append((os.path.getmtime(json_path), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        _, json_path = self._paths(key)
+        try:
+            with open(json_path, "r") as f:
+                payload = json.load(f)
+            # Touch so the LRU order survives restarts
+            os.utime(json_path)
+            return payload
+        except (OSError, ValueError):
+            with self._lock:
+                size = self._entries.pop(key, 0)
+                self._size -= size
+            return None
+
+    def _write(self, key: str, payload: Dict[str, Any]) -> None:
+        cached_mp3, json_path = self._paths(key)
+        # Write to temp names and rename so readers never see partial entries
+        with open(cached_mp3 + ".tmp", "wb") as f:
+            f.write(base64.b64decode(payload["audio"]))
+        os.replace(cached_mp3 + ".tmp", cached_mp3)
+        with open(json_path + ".tmp", "w") as f:
+            json.dump(payload, f)
+        os.replace(json_path + ".tmp", json_path)
+
+        size = os.path.getsize(cached_mp3) + os.path.getsize(json_path)
+        with self._lock:
+            self._size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return {"audio", "lipsync"} for a cached utterance, or None
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        payload = await asyncio.to_thread(self._read, key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    async def put(self, key: str, audio_base64: str, lipsync: Dict[str, Any]) -> bool:
+        """
+        Store a synthesized utterance; incomplete results are not cached.
+        Returns whether the entry was stored.
+        """
+        if not audio_base64 or not lipsync:
+            return False
+        try:
+            await asyncio.to_thread(
+                self._write, key, {"audio": audio_base64, "lipsync": lipsync}
+            )
+            return True
+        except OSError as e:
+            logger.error(f"Failed to cache synthesized audio {key}: {str(e)}")
+            return False
+
+
+tts_cache = TTSCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES)
@@ -0,0 +1,127 @@
+# app/services/voice_activity.py
+import math
+import sys
+from array import array
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+def pcm_rms(frame: bytes) -> float:
+    """
+    RMS level of 16-bit little-endian mono PCM
+    """
+    samples = array("h")
+    samples.frombytes(frame[: len(frame) - len(frame) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyVAD:
+    """
+    Energy-based voice activity segmentation of a 16-bit mono PCM stream.
+
+    feed() returns events as they happen:
+      ("segment", pcm) once a stretch of speech is followed by a short pause
+        (segment_silence_ms), or reaches max_segment_ms; segments can be
+        transcribed while the user keeps talking.
+      ("end", b"") once speech is followed by a long pause
+        (utterance_silence_ms): the utterance is over.
+
+    A frame counts as speech when its RMS exceeds both min_rms and a multiple
+    of the running noise floor. A little audio from before the speech onset
+    is kept so word starts are not clipped.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        min_rms: float = 300,
+        noise_multiplier: float = 3.0,
+        segment_silence_ms: int = 300,
+        utterance_silence_ms: int = 800,
+        max_segment_ms: int = 15000,
+        preroll_ms: int = 210,
+    ):
+        self.frame_ms = frame_ms
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.min_rms = min_rms
+        self.noise_multiplier = noise_multiplier
+        self.segment_silence_ms = segment_silence_ms
+        self.utterance_silence_ms = utterance_silence_ms
+        self.max_segment_bytes = int(sample_rate * max_segment_ms / 1000) * 2
+        self.noise_floor: Optional[float] = None
+
+        self._pending = bytearray()
+        self._segment = bytearray()
+        self._preroll: deque = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._in_utterance = False
+        self._silence_ms = 0
+
+    def _is_speech(self, rms: float) -> bool:
+        threshold = self.min_rms
+        if self.noise_floor is not None:
+            threshold = max(threshold, self.noise_floor * self.noise_multiplier)
+        return rms >= threshold
+
+    def _update_noise_floor(self, rms: float) -> None:
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        else:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+
+    def feed(self, pcm: bytes) -> List[Tuple[str, bytes]]:
+        events: List[Tuple[str, bytes]] = []
+        self._pending.extend(pcm)
+
+        while len(self._pending) >= self.frame_bytes:
+            frame = bytes(self._pending[: self.frame_bytes])
+            del self._pending[: self.frame_bytes]
+            rms = pcm_rms(frame)
+
+            if self._is_speech(rms):
+                if not self._segment:
+                    self._segment.extend(b"".join(self._preroll))
+                    self._preroll.clear()
+                self._segment.extend(frame)
+                self._in_utterance = True
+                self._silence_ms = 0
+            else:
+                self._update_noise_floor(rms)
+                if self._segment:
+                    self._segment.extend(frame)
+                else:
+                    self._preroll.append(frame)
+                if self._in_utterance:
+                    self._silence_ms += self.frame_ms
+                    if self._segment and self._silence_ms >= self.segment_silence_ms:
+                        events.append(("segment", bytes(self._segment)))
+                        self._segment.clear()
+                    if self._silence_ms >= self.utterance_silence_ms:
+                        events.append(("end", b""))
+                        self._in_utterance = False
+                        self._silence_ms = 0
+
+            if len(self._segment) >= self.max_segment_bytes:
+                events.append(("segment", bytes(self._segment)))
+                self._segment.clear()
+
+        return events
+
+    def flush(self) -> List[Tuple[str, bytes]]:
+        """
+        End the current utterance now (e.g. the client pressed stop)
+        """
+        events: List[Tuple[str, bytes]] = []
+        if self._segment:
+            events.append(("segment", bytes(self._segment)))
+            self._segment.clear()
+        if self._in_utterance:
+            events.append(("end", b""))
+        self._in_utterance = False
+        self._silence_ms = 0
+        self._pending.clear()
+        return events
@@ -0,0 +1,230 @@
+# app/services/whisper_engine.py
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.core.resilience import OverloadedError
+
+logger = logging.getLogger(__name__)
+
+# A clip is a path to an audio file or raw 16 kHz mono 16-bit PCM bytes
+Clip = Union[str, bytes]
+
+SAMPLE_RATE = 16000
+# Whisper decodes 30 second windows; shorter clips can be decoded as one batch
+MAX_BATCH_CLIP_SECONDS = 30
+
+# Per worker process state, set by _init_worker
+_model = None
+
+
+def _init_worker(model_name: str, quantize: bool, threads: int) -> None:
+    """
+    Load the Whisper model once per worker process
+    """
+    global _model
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    model = whisper.load_model(model_name, device="cpu")
+    if quantize:
+        # int8 weights for the Linear layers (most of the compute) on CPU
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    _model = model
+
+
+def _load_clip(clip: Clip):
+    import numpy as np
+    import whisper
+
+    if isinstance(clip, bytes):
+        return np.frombuffer(clip, dtype=np.int16).astype(np.float32) / 32768.0
+    return whisper.load_audio(clip)
+
+
+def _transcribe_batch(clips: List[Clip], language: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Transcribe a batch of clips in a worker process.
+
+    Clips of up to 30 seconds are decoded together in one batched forward
+    pass; longer clips fall back to whisper's sliding-window transcribe().
+    """
+    import torch
+    import whisper
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(clips)
+    short: List[Tuple[int, Any]] = []
+    for index, clip in enumerate(clips):
+        try:
+            audio = _load_clip(clip)
+        except Exception as e:
+            results[index] = {"text": "", "error": str(e)}
+            continue
+        duration = len(audio) / SAMPLE_RATE
+        if duration <= MAX_BATCH_CLIP_SECONDS:
+            short.append((index, audio))
+        else:
+            result = _model.transcribe(audio, fp16=False, language=language)
+            results[index] = {
+                "text": result["text"].strip(),
+                "language": result.get("language"),
+                "duration": duration,
+            }
+
+    if short:
+        mels = torch.stack(
+            [
+                # large-v3 uses 128 mel bins, earlier models 80
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=_model.dims.n_mels)
+                for _, audio in short
+            ]
+        )
+        options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+        decoded = whisper.decode(_model, mels, options)
+        for (index, audio), result in zip(short, decoded):
+            results[index] = {
+                "text": result.text.strip(),
+                "language": result.language,
+                "duration": len(audio) / SAMPLE_RATE,
+            }
+    return results
+
+
+class WhisperEngine:
+    """
+    Local Whisper transcription on a process pool.
+
+    Each worker loads the model once (optionally with int8 dynamic
+    quantization). Requests are queued and grouped into batches of up to
+    batch_size clips, waiting at most batch_wait_ms for a batch to fill, and
+    at most one batch per worker is in flight so the queue absorbs bursts.
+    Beyond max_queue waiting clips, transcribe() raises OverloadedError. If a
+    worker dies (e.g. OOM) the pool is rebuilt; the batch it was running fails.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        threads_per_worker: int,
+        batch_size: int,
+        batch_wait_ms: float,
+        quantize: bool,
+        language: Optional[str] = None,
+        max_queue: int = 64,
+    ):
+        self.model_name = model_name
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.quantize = quantize
+        self.language = language
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self.batches = 0
+        self.clips = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn, not fork: torch does not survive forking a threaded parent
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.quantize, self.threads_per_worker),
+        )
+
+    def _start(self) -> None:
+        self._executor = self._new_executor()
+        self._queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run_batcher())
+        logger.info(
+            f"Started local Whisper ({self.model_name}, {self.workers} workers, "
+            f"quantize={self.quantize})"
+        )
+
+    async def transcribe(self, clip: Clip) -> Dict[str, Any]:
+        """
+        Transcribe an audio file path or 16 kHz mono int16 PCM bytes; returns
+        {"text", "language", "duration"}
+        """
+        if self._executor is None:
+            self._start()
+        if self._queue.qsize() >= self.max_queue:
+            raise OverloadedError("Too many queued transcriptions")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((clip, future))
+        return await future
+
+    async def _run_batcher(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            await self._in_flight.acquire()
+            # Fill the batch with whatever arrives while we wait
+            deadline = time.monotonic() + self.batch_wait_ms / 1000
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Clip, asyncio.Future]]) -> None:
+        executor = self._executor
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                executor,
+                _transcribe_batch,
+                [clip for clip, _ in batch],
+                self.language,
+            )
+            self.batches += 1
+            self.clips += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                # A worker died; every later submit would fail on this pool
+                logger.error("Local Whisper worker died, restarting the process pool")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.release()
+
+    async def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown)
+            self._executor = None
+
+
+whisper_engine = WhisperEngine(
+    model_name=settings.WHISPER_LOCAL_MODEL,
+    workers=settings.WHISPER_LOCAL_WORKERS,
+    threads_per_worker=settings.WHISPER_LOCAL_THREADS,
+    batch_size=settings.WHISPER_LOCAL_BATCH_SIZE,
+    batch_wait_ms=settings.WHISPER_LOCAL_BATCH_WAIT_MS,
+    quantize=settings.WHISPER_LOCAL_QUANTIZE,
+    language=settings.WHISPER_LOCAL_LANGUAGE or None,
+    max_queue=settings.WHISPER_LOCAL_MAX_QUEUE,
+)
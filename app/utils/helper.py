@@ -0,0 +1,79 @@
+# app/utils/helper.py
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class StageTimer:
+    """
+    Collect wall-clock durations (ms) for the named stages of a request
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (time.perf_counter() - start) * 1000
+
+    async def track(self, name: str, awaitable: Awaitable[T]) -> T:
+        """
+        Await and time a coroutine; handy for stages run under asyncio.gather
+        """
+        with self.stage(name):
+            return await awaitable
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def server_timing_header(self) -> str:
+        """
+        Format the stages as a Server-Timing header value
+        """
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        entries.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(entries)
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header ("bytes=start-end", "bytes=start-" or
+    "bytes=-suffix") into an inclusive (start, end) pair.
+
+    Returns None when there is no usable range (serve the whole body) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        # Multipart ranges are not supported; fall back to the full body
+        return None
+
+    start_text, end_text = (part.strip() for part in spec.split("-", 1))
+    if not all(text == "" or text.isdigit() for text in (start_text, end_text)):
+        return None
+
+    if not start_text:
+        if not end_text:
+            return None
+        suffix = int(end_text)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(0, size - suffix), size - 1
+    else:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if end_text and end < start:
+            return None
+
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
@@ -1,4 +1,5 @@
 # main.py
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -7,6 +8,16 @@ from datetime import datetime
 from app.api import auth, chatbot, hr, admin
 from app.database import Base, engine
 from app.config import settings
+from app.core.revocation import revocation_list
+from app.core.llm_usage import llm_usage_recorder
+from app.services.elevenlabs_service import elevenlabs_service
+from app.services.audio_service import audio_service
+from app.services.audio_janitor import audio_janitor
+from app.services.chat import intro_bundle
+from app.services.speech_service import speech_service
+from app.services.email import EmailService
+from app.services.smtp_pool import smtp_pool
+from app.services.alert_jobs import bulk_alert_jobs
 import logging
 
 from dotenv import load_dotenv, dotenv_values
@@ -38,6 +49,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Revocations must be known before the first request is authenticated;
+    # startup fails rather than serving with an empty list
+    await asyncio.to_thread(revocation_list.load)
+
+    # Keep references so the tasks are not garbage collected
+    app.state.background_tasks = [
+        asyncio.create_task(revocation_list.run_refresh_loop()),
+        asyncio.create_task(llm_usage_recorder.run_flush_loop()),
+        asyncio.create_task(audio_janitor.run_loop()),
+        asyncio.create_task(intro_bundle.load()),
+    ]
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    await llm_usage_recorder.drain()
+    await elevenlabs_service.close()
+    await speech_service.close()
+    audio_service.close()
+    await bulk_alert_jobs.close()
+    await EmailService.drain_background_sends()
+    await smtp_pool.close()
+
+
 @app.middleware("http")
 async def log_requests(request, call_next):
     logger.info(f"[{datetime.now().isoformat()}] {request.method} {request.url.path}")
@@ -0,0 +1,56 @@
+# scripts/benchmark_whisper.py
+"""
+Throughput benchmark for the local Whisper engine.
+
+    python -m scripts.benchmark_whisper clip1.wav clip2.wav --repeat 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.config import settings
+from app.services.whisper_engine import WhisperEngine
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    engine = WhisperEngine(
+        model_name=args.model,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        batch_size=args.batch_size,
+        batch_wait_ms=args.batch_wait_ms,
+        quantize=args.quantize,
+    )
+    # Warm up: start the workers and load the model in each of them
+    await asyncio.gather(*(engine.transcribe(args.clips[0]) for _ in range(args.workers)))
+
+    clips = [os.path.abspath(path) for path in args.clips] * args.repeat
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.transcribe(clip) for clip in clips))
+    elapsed = time.perf_counter() - start
+    await engine.close()
+
+    audio_seconds = sum(result.get("duration") or 0 for result in results)
+    print(f"model={args.model} workers={args.workers} threads={args.threads} "
+          f"batch_size={args.batch_size} quantize={args.quantize}")
+    print(f"{len(clips)} clips in {elapsed:.2f}s: {len(clips) / elapsed:.2f} clips/s, "
+          f"{audio_seconds / elapsed:.1f}x realtime, "
+          f"{engine.clips / max(engine.batches, 1):.1f} clips per batch")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark local Whisper throughput")
+    parser.add_argument("clips", nargs="+", help="Audio files to transcribe")
+    parser.add_argument("--repeat", type=int, default=4, help="Times each clip is submitted")
+    parser.add_argument("--model", default=settings.WHISPER_LOCAL_MODEL)
+    parser.add_argument("--workers", type=int, default=settings.WHISPER_LOCAL_WORKERS)
+    parser.add_argument("--threads", type=int, default=settings.WHISPER_LOCAL_THREADS)
+    parser.add_argument("--batch-size", type=int, default=settings.WHISPER_LOCAL_BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=float, default=settings.WHISPER_LOCAL_BATCH_WAIT_MS)
+    parser.add_argument("--quantize", action="store_true", default=settings.WHISPER_LOCAL_QUANTIZE)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
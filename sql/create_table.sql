@@ -24,6 +24,7 @@ CREATE TABLE IF NOT EXISTS chat_sessions (
     start_time TIMESTAMPTZ DEFAULT now(),
     end_time TIMESTAMPTZ,
     summary TEXT,
+    summarized_messages INT DEFAULT 0,
     escalated BOOLEAN DEFAULT FALSE,
     suggestions TEXT,
     risk_factors TEXT,
@@ -96,4 +97,32 @@ CREATE TABLE IF NOT EXISTS vibemeter_data (
     vibe_score INT NOT NULL,
     emotion_zone VARCHAR(50) NOT NULL,
     FOREIGN KEY (employee_id) REFERENCES employees(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+CREATE TABLE IF NOT EXISTS token_revocations (
+    id SERIAL PRIMARY KEY,
+    subject CHAR(10) NOT NULL,
+    revoked_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    reason VARCHAR(100)
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_revocations_subject ON token_revocations (subject);
+
+-- Existing databases created before the rolling conversation summary
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS summarized_messages INT DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    endpoint VARCHAR(50) NOT NULL,
+    task VARCHAR(30) NOT NULL,
+    model VARCHAR(50) NOT NULL,
+    prompt_tokens INT NOT NULL DEFAULT 0,
+    completion_tokens INT NOT NULL DEFAULT 0,
+    cached_tokens INT NOT NULL DEFAULT 0,
+    latency_ms DOUBLE PRECISION NOT NULL,
+    retries INT NOT NULL DEFAULT 0,
+    fallback BOOLEAN NOT NULL DEFAULT FALSE,
+    success BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created_at ON llm_usage (created_at);
@@ -0,0 +1,48 @@
+import pytest
+
+from app.utils.helper import parse_byte_range
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=500-5000", (500, 999)),
+        ("bytes=999-999", (999, 999)),
+        ("bytes= 10 - 20 ", (10, 20)),
+    ],
+)
+def test_satisfiable_ranges(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "",
+        "items=0-99",
+        "bytes=0-99,200-299",
+        "bytes=100",
+        "bytes=-",
+        "bytes=a-b",
+        "bytes=-1-2",
+        "bytes=200-100",
+    ],
+)
+def test_unusable_ranges_serve_the_whole_body(header):
+    assert parse_byte_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, 1000)
+
+
+def test_empty_body_cannot_satisfy_a_range():
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=-10", 0)
@@ -0,0 +1,90 @@
+from app.services.chat import (
+    MESSAGE_TOKEN_OVERHEAD,
+    ChatHistoryBuilder,
+    count_tokens,
+)
+
+
+def make_rows(turns):
+    # Stored the way the chatbot saves them: one row per user or bot message
+    rows = []
+    for i in range(turns):
+        rows.append({"question": f"question {i}", "answer": ""})
+        rows.append({"question": "", "answer": f"answer {i}"})
+    return rows
+
+
+def turn_tokens(i):
+    return sum(
+        count_tokens(text) + MESSAGE_TOKEN_OVERHEAD
+        for text in (f"question {i}", f"answer {i}")
+    )
+
+
+def test_rows_become_chat_messages():
+    messages = ChatHistoryBuilder.to_chat_messages(make_rows(1))
+
+    assert messages == [
+        {"role": "user", "content": "question 0"},
+        {"role": "assistant", "content": "answer 0"},
+    ]
+
+
+def test_everything_fits():
+    builder = ChatHistoryBuilder(token_budget=10000, max_turns=10)
+
+    history = builder.build(make_rows(3), summary=None, summarized_count=0)
+
+    assert len(history.messages) == 6
+    assert history.to_summarize == []
+    assert history.summarized_count == 0
+
+
+def test_keeps_only_max_turns():
+    builder = ChatHistoryBuilder(token_budget=10000, max_turns=2)
+
+    history = builder.build(make_rows(5), summary=None, summarized_count=0)
+
+    assert [m["content"] for m in history.messages] == [
+        "question 3", "answer 3", "question 4", "answer 4",
+    ]
+    assert len(history.to_summarize) == 6
+    assert history.to_summarize[0]["content"] == "question 0"
+    assert history.summarized_count == 6
+
+
+def test_token_budget_keeps_whole_turns():
+    # Room for the last turn and part of the one before it
+    builder = ChatHistoryBuilder(token_budget=turn_tokens(2) + 1, max_turns=10)
+
+    history = builder.build(make_rows(3), summary=None, summarized_count=0)
+
+    assert [m["content"] for m in history.messages] == ["question 2", "answer 2"]
+    assert history.summarized_count == 4
+
+
+def test_summary_counts_against_the_budget():
+    summary = "the employee talked about their workload"
+    budget = turn_tokens(2) + count_tokens(summary) + MESSAGE_TOKEN_OVERHEAD
+    builder = ChatHistoryBuilder(token_budget=budget, max_turns=10)
+
+    history = builder.build(make_rows(3), summary=summary, summarized_count=2)
+
+    assert history.messages[0] == {
+        "role": "system",
+        "content": f"Summary of the earlier conversation: {summary}",
+    }
+    assert [m["content"] for m in history.messages[1:]] == ["question 2", "answer 2"]
+    # Only what the summary does not cover yet is folded in
+    assert [m["content"] for m in history.to_summarize] == ["question 1", "answer 1"]
+    assert history.summarized_count == 4
+
+
+def test_summarized_messages_are_never_resent():
+    builder = ChatHistoryBuilder(token_budget=10000, max_turns=10)
+
+    history = builder.build(make_rows(3), summary="earlier", summarized_count=4)
+
+    assert [m["content"] for m in history.messages[1:]] == ["question 2", "answer 2"]
+    assert history.to_summarize == []
+    assert history.summarized_count == 4
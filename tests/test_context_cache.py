@@ -0,0 +1,56 @@
+import pytest
+
+from app.services import context_cache
+from app.services.context_cache import EmployeeContextCache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def get_employee_data(db, employee_id):
+        calls.append(employee_id)
+        return {"employee_id": employee_id, "version": len(calls)}
+
+    monkeypatch.setattr(
+        context_cache.AnalyticsService, "get_employee_data", staticmethod(get_employee_data)
+    )
+    return calls
+
+
+def test_primed_context_is_reused(loads):
+    cache = EmployeeContextCache()
+    cache.prime(None, "session-1", "EMP0001")
+
+    for _ in range(3):
+        assert cache.get(None, "session-1", "EMP0001")["version"] == 1
+    assert loads == ["EMP0001"]
+
+
+def test_context_is_not_shared_across_employees(loads):
+    cache = EmployeeContextCache()
+    cache.prime(None, "session-1", "EMP0001")
+
+    assert cache.get(None, "session-1", "EMP0002")["employee_id"] == "EMP0002"
+
+
+def test_invalidate_drops_every_session_of_the_employee(loads):
+    cache = EmployeeContextCache()
+    cache.prime(None, "session-1", "EMP0001")
+    cache.prime(None, "session-2", "EMP0001")
+    cache.prime(None, "session-3", "EMP0002")
+
+    assert cache.invalidate_employees(["EMP0001"]) == 2
+
+    assert cache.get(None, "session-1", "EMP0001")["version"] == 4
+    assert cache.get(None, "session-2", "EMP0001")["version"] == 5
+    # Other employees keep their cached context
+    assert cache.get(None, "session-3", "EMP0002")["version"] == 3
+
+
+def test_invalidate_ignores_unknown_employees(loads):
+    cache = EmployeeContextCache()
+    cache.prime(None, "session-1", "EMP0001")
+
+    assert cache.invalidate_employees(["EMP0009"]) == 0
+    assert cache.get(None, "session-1", "EMP0001")["version"] == 1
@@ -0,0 +1,41 @@
+import io
+import math
+import wave
+from array import array
+
+from app.services import fast_lipsync
+
+RATE = 16000
+
+
+def make_wav(segments, duration=3.0):
+    samples = array("h", [0] * int(duration * RATE))
+    for start, end in segments:
+        for i in range(int(start * RATE), int(end * RATE)):
+            samples[i] = int(8000 * math.sin(2 * math.pi * 200 * i / RATE))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def test_every_voiced_segment_moves_the_mouth():
+    segments = [(0.1, 0.4), (0.7, 1.0), (1.3, 1.6), (1.9, 2.2), (2.5, 2.8)]
+    # Far more shapes than fit at MIN_CUE_SECONDS each
+    text = "the quick brown fox jumps over the lazy dog and some more words " * 3
+
+    cues = fast_lipsync.generate(text, make_wav(segments))["mouthCues"]
+
+    for start, end in segments:
+        voiced = [
+            cue for cue in cues
+            if cue["value"] != "X" and cue["start"] < end and cue["end"] > start
+        ]
+        assert voiced, f"segment {start}-{end} has no mouth movement"
+    assert cues[-1] == {"start": 2.8, "end": 3.0, "value": "X"}
+    for cue in cues:
+        if cue["value"] != "X":
+            assert cue["end"] - cue["start"] >= fast_lipsync.MIN_CUE_SECONDS - 0.011
@@ -0,0 +1,93 @@
+import pytest
+
+from app.config import Settings
+from app.core import model_router as router_module
+from app.core.model_router import ModelRouter
+
+CALM = {"vibe_history": [{"emotion": "Happy Zone"}]}
+RISKY = {"vibe_history": [{"emotion": "Sad Zone"}, {"emotion": "Happy Zone"}]}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    for name, value in {
+        "CHAT_MODEL": "large",
+        "CHAT_SMALL_MODEL": "small",
+        "CHAT_CLOSING_MODEL": "closing",
+        "CHAT_SMALL_TALK_TURNS": 2,
+        "CHAT_CLOSING_TURN": 6,
+        "CHAT_RISK_ROUTING_THRESHOLD": 4,
+    }.items():
+        monkeypatch.setattr(router_module.settings, name, value)
+    return ModelRouter()
+
+
+def test_small_talk_uses_the_small_model(router):
+    choice = router.for_chat_turn("s1", turn_index=0, employee_data=CALM)
+
+    assert (choice.task, choice.model) == ("chat_small", "small")
+
+
+def test_later_turns_use_the_chat_model(router):
+    choice = router.for_chat_turn("s1", turn_index=2, employee_data=CALM)
+
+    assert (choice.task, choice.model, choice.reason) == ("chat", "large", "default")
+
+
+def test_risky_recent_vibe_skips_small_talk(router):
+    choice = router.for_chat_turn("s1", turn_index=0, employee_data=RISKY)
+
+    assert choice.model == "large"
+    assert choice.reason == "recent vibe in risk zone"
+
+
+def test_escalated_session_skips_small_talk(router):
+    choice = router.for_chat_turn("s1", turn_index=0, employee_data=CALM, escalated=True)
+
+    assert choice.model == "large"
+
+
+def test_risk_in_an_earlier_turn_skips_small_talk(router):
+    router.record_turn("s1", {"risk_score": 5})
+
+    assert router.for_chat_turn("s1", 1, CALM).model == "large"
+    # Other sessions are unaffected
+    assert router.for_chat_turn("s2", 1, CALM).model == "small"
+
+
+def test_escalation_counts_as_risk(router):
+    router.record_turn("s1", {"risk_score": 0, "hr_escalation": True})
+    router.record_turn("s1", {"risk_score": 1})
+
+    assert router.for_chat_turn("s1", 1, CALM).model == "large"
+
+
+def test_closing_turns_use_the_closing_model(router):
+    router.record_turn("s1", {"risk_score": 9})
+
+    choice = router.for_chat_turn("s1", turn_index=6, employee_data=RISKY)
+
+    assert (choice.task, choice.model) == ("closing", "closing")
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in ("OPENAI_MODEL", "CHAT_MODEL", "CHAT_CLOSING_MODEL", "REPORT_MODEL",
+                 "MAX_TOKENS", "REPORT_MAX_TOKENS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_task_models_follow_the_loaded_openai_model(clean_env):
+    settings = Settings(_env_file=None, OPENAI_MODEL="gpt-x", MAX_TOKENS=321)
+
+    assert settings.CHAT_MODEL == "gpt-x"
+    assert settings.CHAT_CLOSING_MODEL == "gpt-x"
+    assert settings.REPORT_MODEL == "gpt-x"
+    assert settings.REPORT_MAX_TOKENS == 321
+
+
+def test_task_models_can_be_set_separately(clean_env):
+    settings = Settings(_env_file=None, OPENAI_MODEL="gpt-x", REPORT_MODEL="gpt-y")
+
+    assert settings.CHAT_MODEL == "gpt-x"
+    assert settings.REPORT_MODEL == "gpt-y"
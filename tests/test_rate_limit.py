@@ -0,0 +1,101 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import LoginThrottle, SlidingWindowLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_limiter_blocks_at_the_limit(clock):
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=60)
+
+    limiter.hit("a")
+    assert limiter.retry_after("a") is None
+    clock.now += 10
+    limiter.hit("a")
+
+    # The oldest hit leaves the window 50s from now
+    assert limiter.retry_after("a") == 51
+    assert limiter.retry_after("b") is None
+
+
+def test_limiter_window_slides(clock):
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=60)
+    limiter.hit("a")
+
+    clock.now += 59.5
+    assert limiter.retry_after("a") == 1
+    clock.now += 0.5
+    assert limiter.retry_after("a") is None
+
+
+def test_limiter_caps_tracked_keys(clock):
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+
+    # The least recently used key was dropped
+    assert limiter.retry_after("a") is None
+    assert limiter.retry_after("c") is not None
+
+
+def test_limiter_reset(clock):
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=60)
+    limiter.hit("a")
+    limiter.reset("a")
+
+    assert limiter.retry_after("a") is None
+
+
+@pytest.fixture
+def throttle(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_MAX_FAILURES_PER_IP", 3)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_MAX_FAILURES_PER_ACCOUNT", 2)
+    monkeypatch.setattr(rate_limit.settings, "LOGIN_RATE_WINDOW_SECONDS", 60)
+    return LoginThrottle()
+
+
+def test_successful_logins_from_one_ip_are_never_throttled(throttle):
+    # A whole office behind one NAT address logging in at 9am
+    for i in range(100):
+        account = f"EMP{i:04d}"
+        assert throttle.check("10.0.0.1", account) is None
+        throttle.record_success(account)
+
+
+def test_failures_throttle_the_ip(throttle):
+    for i in range(3):
+        assert throttle.check("10.0.0.1", f"EMP{i:04d}") is None
+        throttle.record_failure("10.0.0.1", f"EMP{i:04d}")
+
+    assert throttle.check("10.0.0.1", "EMP0099") is not None
+    assert throttle.check("10.0.0.2", "EMP0099") is None
+
+
+def test_failures_throttle_the_account_across_ips(throttle):
+    throttle.record_failure("10.0.0.1", "EMP0001")
+    throttle.record_failure("10.0.0.2", "EMP0001")
+
+    assert throttle.check("10.0.0.3", "EMP0001") is not None
+    assert throttle.check("10.0.0.3", "EMP0002") is None
+
+
+def test_success_clears_account_failures(throttle):
+    throttle.record_failure("10.0.0.1", "EMP0001")
+    throttle.record_success("EMP0001")
+    throttle.record_failure("10.0.0.2", "EMP0001")
+
+    assert throttle.check("10.0.0.3", "EMP0001") is None
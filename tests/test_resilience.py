@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimiter,
+    OverloadedError,
+    ResilientCaller,
+)
+
+
+def make_caller(limiter: ConcurrencyLimiter) -> ResilientCaller:
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    # Open the circuit; with reset_seconds=0 it is immediately half-open
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    return ResilientCaller(
+        limiter=limiter,
+        breaker=breaker,
+        is_retryable=lambda e: False,
+        max_retries=0,
+        deadline_seconds=5,
+        queue_timeout_seconds=0.01,
+        backoff_base_seconds=0,
+        backoff_max_seconds=0,
+    )
+
+
+async def ok():
+    return "ok"
+
+
+def test_overloaded_trial_does_not_stick_half_open():
+    async def scenario():
+        limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0)
+        caller = make_caller(limiter)
+
+        async with limiter.slot():
+            with pytest.raises(OverloadedError):
+                await caller.call(ok)
+
+        assert await caller.call(ok) == "ok"
+        assert caller.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_does_not_stick_half_open():
+    async def scenario():
+        caller = make_caller(ConcurrencyLimiter(max_concurrency=2, max_queue=2))
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        trial = asyncio.create_task(caller.call(hang))
+        await started.wait()
+        # Only one trial at a time while it is in flight
+        with pytest.raises(CircuitOpenError):
+            await caller.call(ok)
+
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert await caller.call(ok) == "ok"
+        assert caller.breaker.state == "closed"
+
+    asyncio.run(scenario())
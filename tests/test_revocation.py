@@ -0,0 +1,132 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.config import settings
+from app.core import auth
+from app.core.revocation import RevocationList
+from app.models.employee import UserType
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def group_by(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.added = []
+
+    def query(self, *args):
+        return FakeQuery(self.rows)
+
+    def add(self, row):
+        self.added.append(row)
+
+    def commit(self):
+        pass
+
+
+def test_unknown_subject_is_not_revoked():
+    assert not RevocationList().is_revoked("EMP0001", 1000)
+
+
+def test_revocation_boundaries():
+    revocations = RevocationList()
+    revocations.refresh(
+        FakeSession([(" EMP0001 ", datetime.fromtimestamp(1000.9, timezone.utc))])
+    )
+
+    # The revocation time is floored to iat's whole-second precision
+    assert revocations.is_revoked("EMP0001", 999)
+    assert not revocations.is_revoked("EMP0001", 1000)
+    assert not revocations.is_revoked("EMP0001", 1001)
+    # Tokens without iat predate revocation support
+    assert revocations.is_revoked("EMP0001", None)
+
+
+def test_revoke_applies_immediately():
+    revocations = RevocationList()
+    db = FakeSession()
+    before = int(time.time())
+
+    revocations.revoke(db, "EMP0002", reason="password reset")
+
+    assert len(db.added) == 1
+    assert revocations.is_revoked("EMP0002", before - 1)
+    # Logging in again right after the revocation works
+    assert not revocations.is_revoked("EMP0002", int(time.time()))
+
+
+def test_refresh_replaces_the_list():
+    revocations = RevocationList()
+    revocations.refresh(FakeSession([("EMP0001", datetime.now(timezone.utc))]))
+    revocations.refresh(FakeSession([]))
+
+    assert not revocations.is_revoked("EMP0001", None)
+    assert revocations.last_refresh is not None
+
+
+def make_token(subject, role, issued_at):
+    return jwt.encode(
+        {
+            "sub": subject,
+            "role": role,
+            "status": "not_received",
+            "iat": int(issued_at),
+            "exp": datetime.utcnow() + timedelta(days=1),
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+def principal(token):
+    return asyncio.run(auth.get_token_principal(db=None, token=token))
+
+
+def test_fresh_role_claims_are_trusted():
+    token = make_token("HR0001", "hr", time.time())
+
+    assert principal(token).user_type == UserType.hr
+
+
+def test_stale_role_claims_are_checked_against_the_principal(monkeypatch):
+    token = make_token(
+        "HR0002", "hr", time.time() - settings.ROLE_CLAIM_TTL_SECONDS - 1
+    )
+    # The user has since been demoted
+    monkeypatch.setattr(
+        auth,
+        "_load_principal",
+        lambda db, subject: auth.Employee(id=subject, user_type=UserType.employee),
+    )
+
+    with pytest.raises(HTTPException) as error:
+        auth.get_current_active_hr(principal(token))
+    assert error.value.status_code == 403
+
+
+def test_stale_role_claims_of_deleted_users_are_rejected(monkeypatch):
+    token = make_token(
+        "HR0003", "hr", time.time() - settings.ROLE_CLAIM_TTL_SECONDS - 1
+    )
+    monkeypatch.setattr(auth, "_load_principal", lambda db, subject: None)
+
+    with pytest.raises(HTTPException) as error:
+        principal(token)
+    assert error.value.status_code == 404
@@ -0,0 +1,89 @@
+import asyncio
+import base64
+import os
+
+from app.services.tts_cache import TTSCache
+
+AUDIO = base64.b64encode(b"\xff\xfb" * 500).decode("utf-8")
+LIPSYNC = {"mouthCues": [{"start": 0.0, "end": 0.5, "value": "B"}]}
+
+
+def put(cache, key):
+    return asyncio.run(cache.put(key, AUDIO, LIPSYNC))
+
+
+def get(cache, key):
+    return asyncio.run(cache.get(key))
+
+
+def entry_size(cache, key):
+    return sum(os.path.getsize(path) for path in cache._paths(key))
+
+
+def test_round_trip(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10**6)
+    key = TTSCache.make_key("Hello", "voice", "model")
+
+    assert get(cache, key) is None
+    assert put(cache, key)
+    assert get(cache, key) == {"audio": AUDIO, "lipsync": LIPSYNC}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_keys_depend_on_text_voice_and_model():
+    keys = {
+        TTSCache.make_key("Hello", "voice", "model"),
+        TTSCache.make_key("Hello!", "voice", "model"),
+        TTSCache.make_key("Hello", "other", "model"),
+        TTSCache.make_key("Hello", "voice", "other"),
+    }
+    assert len(keys) == 4
+
+
+def test_incomplete_results_are_not_cached(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10**6)
+
+    assert not asyncio.run(cache.put("a" * 64, AUDIO, {}))
+    assert not asyncio.run(cache.put("b" * 64, "", LIPSYNC))
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10**6)
+    put(cache, "a" * 64)
+    cache.max_bytes = 2 * entry_size(cache, "a" * 64)
+    put(cache, "b" * 64)
+
+    get(cache, "a" * 64)
+    put(cache, "c" * 64)
+
+    assert get(cache, "b" * 64) is None
+    assert not os.path.exists(cache._paths("b" * 64)[0])
+    assert get(cache, "a" * 64) is not None
+    assert get(cache, "c" * 64) is not None
+
+
+def test_index_is_rebuilt_and_trimmed_on_restart(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10**6)
+    for age, key in enumerate(["c" * 64, "b" * 64, "a" * 64]):
+        put(cache, key)
+        mtime = 1_000_000 - age * 100
+        os.utime(cache._paths(key)[1], (mtime, mtime))
+    size = entry_size(cache, "a" * 64)
+
+    # "a" has the oldest payload mtime, so it goes first
+    restarted = TTSCache(str(tmp_path), max_bytes=2 * size)
+
+    assert get(restarted, "a" * 64) is None
+    assert get(restarted, "b" * 64) is not None
+    assert get(restarted, "c" * 64) is not None
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10**6)
+    put(cache, "a" * 64)
+    with open(cache._paths("a" * 64)[1], "w") as f:
+        f.write("{not json")
+
+    assert get(cache, "a" * 64) is None
+    assert "a" * 64 not in cache._entries
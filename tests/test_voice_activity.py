@@ -0,0 +1,106 @@
+from array import array
+
+from app.services.voice_activity import EnergyVAD, pcm_rms
+
+FRAME_SAMPLES = 480  # 30 ms at 16 kHz
+
+
+def frames(count, amplitude):
+    samples = array("h", [amplitude, -amplitude] * (FRAME_SAMPLES // 2))
+    return samples.tobytes() * count
+
+
+def speech(count):
+    return frames(count, 3000)
+
+
+def silence(count):
+    return frames(count, 0)
+
+
+def feed_frames(vad, pcm):
+    # Feed one frame at a time and record (frame_index, kind) per event
+    events = []
+    for i in range(0, len(pcm), vad.frame_bytes):
+        for kind, _ in vad.feed(pcm[i:i + vad.frame_bytes]):
+            events.append((i // vad.frame_bytes, kind))
+    return events
+
+
+def test_pcm_rms():
+    assert pcm_rms(frames(1, 1000)) == 1000
+    assert pcm_rms(b"") == 0.0
+    # A trailing odd byte is ignored
+    assert pcm_rms(frames(1, 1000) + b"\x01") == 1000
+
+
+def test_silence_produces_no_events():
+    vad = EnergyVAD()
+
+    assert vad.feed(silence(100)) == []
+    assert vad.flush() == []
+
+
+def test_short_pause_ends_the_segment_and_long_pause_ends_the_utterance():
+    vad = EnergyVAD()
+
+    events = feed_frames(vad, speech(10) + silence(30))
+
+    # 300 ms of silence (10 frames) closes the segment,
+    # 800 ms (27 frames rounded up) closes the utterance
+    assert events == [(19, "segment"), (36, "end")]
+
+
+def test_pause_between_words_does_not_split_the_segment():
+    vad = EnergyVAD()
+
+    events = vad.feed(speech(5) + silence(5) + speech(5) + silence(30))
+
+    assert [kind for kind, _ in events] == ["segment", "end"]
+    assert len(events[0][1]) == 25 * vad.frame_bytes
+
+
+def test_talking_again_after_a_segment_continues_the_utterance():
+    vad = EnergyVAD()
+
+    events = vad.feed(speech(5) + silence(15) + speech(5) + silence(30))
+
+    assert [kind for kind, _ in events] == ["segment", "segment", "end"]
+
+
+def test_segment_includes_preroll_before_onset():
+    vad = EnergyVAD()
+
+    events = vad.feed(silence(20) + speech(5) + silence(10))
+
+    # 210 ms preroll + speech + the closing 300 ms of silence
+    assert events == [("segment", silence(7) + speech(5) + silence(10))]
+
+
+def test_long_speech_is_split_at_max_segment_length():
+    vad = EnergyVAD(max_segment_ms=300)
+
+    events = vad.feed(speech(25))
+
+    assert [len(pcm) for _, pcm in events] == [10 * vad.frame_bytes] * 2
+
+
+def test_partial_frames_are_buffered():
+    vad = EnergyVAD()
+    pcm = speech(10) + silence(30)
+
+    events = []
+    for i in range(0, len(pcm), 333):
+        events.extend(vad.feed(pcm[i:i + 333]))
+
+    assert [kind for kind, _ in events] == ["segment", "end"]
+
+
+def test_flush_ends_the_utterance():
+    vad = EnergyVAD()
+    vad.feed(speech(5) + silence(2))
+
+    events = vad.flush()
+
+    assert events == [("segment", speech(5) + silence(2)), ("end", b"")]
+    assert vad.flush() == []